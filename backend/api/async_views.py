@@ -0,0 +1,272 @@
+"""Async versions of the hot read endpoints.
+
+They are routed by ``foodgram.async_urls``, which the ASGI entry point
+uses. Queries go through the async ORM, so a slow query only parks its own
+request instead of a whole worker. Anything these views do not handle
+(writes, keyset cursors, the browsable API, bad credentials or filters) is
+passed on to the regular DRF views, which remain the reference behaviour.
+"""
+
+import math
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import NotFound
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from recipes.cache import GLOBAL_SCOPE
+from recipes.metrics import record_cache
+from recipes.models import Recipe
+from recipes.search import ingredient_index, search_ingredients
+from recipes.tokens import aget_user
+from users.models import User
+
+from .caching import (
+    anonymous_cache_key,
+    conditional_validators,
+    list_cache_scope,
+    set_validators,
+)
+from .filters import RecipeFilter
+from .pagination import StandardResultsSetPagination
+from .serializers import FollowSerializer, RecipeReadSerializer
+from .views import (
+    IngredientViewSet,
+    RecipeViewSet,
+    UserViewSet,
+    ingredient_etag,
+    with_recipe_preview,
+)
+
+renderer = JSONRenderer()
+
+
+def json_response(data, status=200):
+    return HttpResponse(
+        renderer.render(data), status=status, content_type=renderer.media_type
+    )
+
+
+async def authenticate(request):
+    """Token authentication; ``None`` when the credentials are not valid."""
+    header = request.headers.get("Authorization", "").split()
+    if not header or header[0].lower() != "token":
+        return AnonymousUser()
+    if len(header) != 2:
+        return None
+    user = await aget_user(header[1])
+    if user is None or not user.is_active:
+        return None
+    return user
+
+
+def wants_json(request):
+    return "format" not in request.GET and "text/html" not in request.headers.get(
+        "Accept", ""
+    )
+
+
+def async_read(fallback):
+    """Serve GETs with the decorated coroutine, everything else with ``fallback``.
+
+    The coroutine may also return ``None`` to hand a request over.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method in ("GET", "HEAD") and wants_json(request):
+                user = await authenticate(request)
+                if user is not None:
+                    request.user = user
+                    try:
+                        response = await view(request, *args, **kwargs)
+                    except NotFound as error:
+                        response = json_response({"detail": error.detail}, 404)
+                    if response is not None:
+                        return response
+            return await sync_to_async(fallback)(request, *args, **kwargs)
+
+        # Lets metrics label the view like the DRF action it stands in for.
+        wrapper.cls, wrapper.actions = fallback.cls, fallback.actions
+        return csrf_exempt(wrapper)
+
+    return decorator
+
+
+async def paginate(request, queryset):
+    """Page-number pagination matching ``StandardResultsSetPagination``."""
+    pagination = StandardResultsSetPagination
+    page_size = pagination.page_size
+    try:
+        page_size = min(
+            int(request.GET[pagination.page_size_query_param]),
+            pagination.max_page_size,
+        )
+        if page_size <= 0:
+            raise ValueError
+    except (KeyError, ValueError):
+        page_size = pagination.page_size
+
+    count = await queryset.acount()
+    num_pages = max(1, math.ceil(count / page_size))
+    number = request.GET.get(pagination.page_query_param, 1)
+    try:
+        number = num_pages if number in pagination.last_page_strings else int(number)
+    except ValueError:
+        raise NotFound(pagination.invalid_page_message)
+    if not 1 <= number <= num_pages:
+        raise NotFound(pagination.invalid_page_message)
+
+    bottom = (number - 1) * page_size
+    objects = [obj async for obj in queryset[bottom : bottom + page_size]]
+    url = request.build_absolute_uri()
+    param = pagination.page_query_param
+    previous = None
+    if number > 1:
+        previous = (
+            remove_query_param(url, param)
+            if number == 2
+            else replace_query_param(url, param, number - 1)
+        )
+    return objects, {
+        "count": count,
+        "next": (
+            replace_query_param(url, param, number + 1) if number < num_pages else None
+        ),
+        "previous": previous,
+    }
+
+
+async def cached_data(request, scope, build):
+    """``build()`` through the anonymous response cache of the sync views."""
+    if request.user.is_authenticated:
+        return await build(), None
+    key = anonymous_cache_key(request, scope)
+    data = await cache.aget(key)
+    record_cache("recipe_responses", data is not None)
+    if data is not None:
+        return data, "HIT"
+    data = await build()
+    await cache.aset(key, data, settings.RECIPE_CACHE_TIMEOUT)
+    return data, "MISS"
+
+
+async def filtered_recipes(request):
+    filterset = RecipeFilter(
+        request.GET,
+        queryset=Recipe.objects.for_read(request.user).order_by("-pub_date", "-id"),
+        request=request,
+    )
+    # Validating the filters may look rows up (``?author=``).
+    if not await sync_to_async(filterset.is_valid)():
+        return None
+    return filterset.qs
+
+
+async def conditional_recipes(request, scope, build):
+    """Same validators and cache as ``ConditionalGetMixin`` and friends."""
+    etag, last_modified = conditional_validators(request, scope, "json")
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return set_validators(response, etag, last_modified)
+
+    data, outcome = await cached_data(request, scope, build)
+    response = json_response(data)
+    if outcome:
+        response["X-Cache"] = outcome
+    return set_validators(response, etag, last_modified)
+
+
+@async_read(
+    RecipeViewSet.as_view(
+        {"get": "list", "post": "create"}, basename="recipes", detail=False
+    )
+)
+async def recipe_list(request):
+    if "cursor" in request.GET:
+        return None
+    queryset = await filtered_recipes(request)
+    if queryset is None:
+        return None
+
+    async def build():
+        recipes, page = await paginate(request, queryset)
+        serializer = RecipeReadSerializer(
+            recipes, many=True, context={"request": request}
+        )
+        return {**page, "results": serializer.data}
+
+    return await conditional_recipes(request, list_cache_scope(request), build)
+
+
+@async_read(
+    RecipeViewSet.as_view(
+        {
+            "get": "retrieve",
+            "put": "update",
+            "patch": "partial_update",
+            "delete": "destroy",
+        },
+        basename="recipes",
+        detail=True,
+    )
+)
+async def recipe_detail(request, pk):
+    queryset = await filtered_recipes(request)
+    if queryset is None:
+        return None
+    queryset = queryset.filter(pk=pk)
+
+    async def build():
+        recipe = await queryset.afirst()
+        if recipe is None:
+            raise NotFound("No Recipe matches the given query.")
+        serializer = RecipeReadSerializer(
+            recipe, context={"request": request, "image_rendition": "full"}
+        )
+        return serializer.data
+
+    return await conditional_recipes(request, GLOBAL_SCOPE, build)
+
+
+@async_read(
+    IngredientViewSet.as_view({"get": "list"}, basename="ingredients", detail=False)
+)
+async def ingredient_list(request):
+    # The index lives in memory; the database is only read to (re)load it.
+    name = request.GET.get("name", "")
+    snapshot = await sync_to_async(ingredient_index.snapshot)()
+    etag = ingredient_etag(snapshot, name)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = json_response(search_ingredients(name, snapshot=snapshot))
+    response["ETag"] = etag
+    return response
+
+
+@async_read(
+    UserViewSet.as_view(
+        {"get": "subscriptions"},
+        basename="users",
+        detail=False,
+        **UserViewSet.subscriptions.kwargs,
+    )
+)
+async def subscriptions(request):
+    if not request.user.is_authenticated:
+        return None
+    queryset = with_recipe_preview(
+        User.objects.filter(followers__user=request.user),
+        request.GET.get("recipes_limit"),
+    ).order_by("username")
+    authors, page = await paginate(request, queryset)
+    serializer = FollowSerializer(authors, many=True, context={"request": request})
+    return json_response({**page, "results": serializer.data})
@@ -0,0 +1,17 @@
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from recipes.tokens import get_user
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """``TokenAuthentication`` with the token's user read from the cache."""
+
+    def authenticate_credentials(self, key):
+        user = get_user(key)
+        if user is None:
+            raise AuthenticationFailed("Invalid token.")
+        if not user.is_active:
+            raise AuthenticationFailed("User inactive or deleted.")
+        return user, Token(key=key, user=user)
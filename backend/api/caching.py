@@ -0,0 +1,147 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from recipes.cache import (
+    GLOBAL_SCOPE,
+    author_scope,
+    get_version,
+    user_scope,
+)
+from recipes.metrics import record_cache
+
+
+def normalized_query(request):
+    # Blank values are kept: ``?cursor=`` asks for a different response
+    # shape than no cursor at all.
+    params = sorted(
+        (key, value) for key, values in request.GET.lists() for value in values
+    )
+    return urlencode(params)
+
+
+def anonymous_cache_key(request, scope):
+    # Responses carry absolute image URLs.
+    raw = "|".join(
+        (
+            request.scheme,
+            request.get_host(),
+            request.path,
+            normalized_query(request),
+            str(get_version(scope)),
+        )
+    )
+    return f"recipes:response:{hashlib.md5(raw.encode()).hexdigest()}"
+
+
+def list_cache_scope(request):
+    author = request.GET.get("author", "")
+    return author_scope(author) if author.isdigit() else GLOBAL_SCOPE
+
+
+class AnonymousCacheMixin:
+    """Caches serialized list/retrieve data for anonymous users.
+
+    Entries are keyed by the normalized query string and a version counter:
+    the per-author one for ``?author=`` lists, the global one otherwise.
+    Recipe and author writes bump the counters (see ``recipes.signals``),
+    so stale entries are never read again and simply expire.
+    """
+
+    def cache_scope(self, request):
+        if self.action == "list":
+            return list_cache_scope(request)
+        return GLOBAL_SCOPE
+
+    def cache_key(self, request):
+        return anonymous_cache_key(request, self.cache_scope(request))
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+
+        key = self.cache_key(request)
+        data = cache.get(key)
+        record_cache("recipe_responses", data is not None)
+        if data is not None:
+            response = Response(data)
+        else:
+            response = handler(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, settings.RECIPE_CACHE_TIMEOUT)
+        response["X-Cache"] = "HIT" if data is not None else "MISS"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+
+def conditional_validators(request, scope, renderer_format):
+    """Strong ETag and Last-Modified of a recipe response, from version counters.
+
+    The counter of ``scope``, plus the user's own one for authenticated
+    users, which their favorites, cart and follows bump. Any change to the
+    response, deletions included, moves one of them. The counters are
+    clock values in microseconds, so the newest one is also when the
+    response last changed.
+    """
+    versions = [get_version(scope)]
+    if request.user.is_authenticated:
+        versions.append(get_version(user_scope(request.user.pk)))
+    raw = "|".join(
+        (
+            request.path,
+            normalized_query(request),
+            renderer_format,
+            *(str(version) for version in versions),
+        )
+    )
+    etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+    # Last-Modified has one-second resolution. While the newest change is
+    # still in the current second, another one could follow within it and
+    # an If-Modified-Since check would miss it, so none is sent yet. Later
+    # versions are always past the clock (see ``bump_version``).
+    changed = max(versions) // 1_000_000
+    last_modified = changed if changed < int(time.time()) else None
+    return etag, last_modified
+
+
+def set_validators(response, etag, last_modified):
+    if response.status_code in (200, 304):
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+class ConditionalGetMixin:
+    """ETag and Last-Modified support for recipe list and retrieve.
+
+    Goes before ``AnonymousCacheMixin``, whose version scopes the validators
+    are derived from, so checking them costs no query. A matching
+    If-None-Match or If-Modified-Since returns 304 before the view runs.
+    """
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = conditional_validators(
+            request, self.cache_scope(request), request.accepted_renderer.format
+        )
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        ) or handler(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
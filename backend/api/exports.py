@@ -0,0 +1,86 @@
+import csv
+import hashlib
+import io
+import json
+from itertools import chain, islice
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from recipes.models import ShoppingListItem
+
+ITERATOR_CHUNK_SIZE = 500
+
+
+def shopping_list_rows(user):
+    return (
+        ShoppingListItem.objects.filter(user=user)
+        .values_list("ingredient__name", "ingredient__measurement_unit", "total_amount")
+        .order_by("ingredient__name", "ingredient__measurement_unit")
+        .iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+    )
+
+
+def render_txt(rows):
+    for index, (name, unit, total) in enumerate(rows):
+        separator = "\n" if index else ""
+        yield f"{separator}{name} ({unit}) — {total}"
+
+
+def render_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(("name", "measurement_unit", "amount"))
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def render_json(rows):
+    yield "["
+    for index, (name, unit, total) in enumerate(rows):
+        item = {"name": name, "measurement_unit": unit, "amount": total}
+        yield ("," if index else "") + json.dumps(item, ensure_ascii=False)
+    yield "]"
+
+
+EXPORT_FORMATS = {
+    "txt": ("text/plain; charset=utf-8", render_txt),
+    "csv": ("text/csv; charset=utf-8", render_csv),
+    "json": ("application/json", render_json),
+}
+
+
+def shopping_list_response(request, file_format="txt"):
+    """Return the user's shopping list in ``file_format``.
+
+    Short lists are rendered in full so they get Content-Length and an ETag
+    (and a 304 on a matching If-None-Match); longer ones are streamed from
+    the database cursor as they are rendered.
+    """
+    content_type, render = EXPORT_FORMATS[file_format]
+    rows = shopping_list_rows(request.user)
+    buffer_rows = settings.SHOPPING_LIST_BUFFER_ROWS
+    head = list(islice(rows, buffer_rows))
+
+    if len(head) < buffer_rows:
+        body = "".join(render(head)).encode()
+        etag = quote_etag(hashlib.md5(body).hexdigest())
+        response = HttpResponse(body, content_type=content_type)
+        response["Content-Length"] = len(body)
+        response["ETag"] = etag
+        response = get_conditional_response(request, etag=etag, response=response)
+    else:
+        response = StreamingHttpResponse(
+            (chunk.encode() for chunk in render(chain(head, rows))),
+            content_type=content_type,
+        )
+    response["Content-Disposition"] = (
+        f'attachment; filename="shopping_cart.{file_format}"'
+    )
+    return response
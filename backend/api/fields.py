@@ -0,0 +1,37 @@
+import io
+
+from django.conf import settings
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
+from rest_framework import serializers
+
+from recipes.images import ImageTooLarge, open_image
+
+
+class ImageUploadField(Base64ImageField):
+    """Base64 image that is size-checked before it is decoded.
+
+    The encoded length bounds the payload and the image header bounds the
+    pixel count, so oversized uploads and decompression bombs are rejected
+    without decoding the pixel data.
+    """
+
+    def to_internal_value(self, base64_data):
+        if isinstance(base64_data, str):
+            encoded = base64_data.partition(";base64,")[2] or base64_data
+            if len(encoded) * 3 // 4 > settings.IMAGE_MAX_UPLOAD_SIZE:
+                raise serializers.ValidationError(
+                    f"Image may not exceed "
+                    f"{settings.IMAGE_MAX_UPLOAD_SIZE // (1024 * 1024)} MB."
+                )
+        return super().to_internal_value(base64_data)
+
+    def get_file_extension(self, filename, decoded_file):
+        try:
+            open_image(io.BytesIO(decoded_file))
+        except (ImageTooLarge, Image.DecompressionBombError) as error:
+            raise serializers.ValidationError(str(error))
+        except Exception:
+            # Not something Pillow can identify; let the parent reject it.
+            pass
+        return super().get_file_extension(filename, decoded_file)
@@ -1,15 +1,17 @@
 from django_filters.rest_framework import FilterSet, AllValuesMultipleFilter
 from django_filters import rest_framework as filters
 from recipes.models import Recipe, Ingredient
+from recipes.search import search_recipes
 
 
 class RecipeFilter(FilterSet):
     is_favorited = filters.BooleanFilter(method="filter_is_favorited")
     is_in_shopping_cart = filters.BooleanFilter(method="filter_is_in_shopping_cart")
+    search = filters.CharFilter(method="filter_search")
 
     class Meta:
         model = Recipe
-        fields = ("author", "is_favorited", "is_in_shopping_cart")
+        fields = ("author", "is_favorited", "is_in_shopping_cart", "search")
 
     def filter_is_favorited(self, queryset, name, value):
         user = self.request.user
@@ -23,8 +25,12 @@ class RecipeFilter(FilterSet):
             return queryset.filter(shopping_cart__user=user)
         return queryset
 
+    def filter_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
+
 
 class IngredientFilter(FilterSet):
+    name = filters.CharFilter(lookup_expr="istartswith")
 
     class Meta:
         model = Ingredient
@@ -1,7 +1,89 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 6
     page_size_query_param = "limit"
     max_page_size = 50
+
+
+class RecipeFeedPagination(StandardResultsSetPagination):
+    """Page numbers by default, keyset pagination when ``?cursor=`` is sent.
+
+    The cursor encodes the (pub_date, id) of the last recipe on the page, so
+    the next page is an index range scan with no OFFSET and no COUNT. It
+    only works in feed order: querysets ordered otherwise, such as ranked
+    search results, are rejected rather than silently reordered.
+    """
+
+    cursor_query_param = "cursor"
+    cursor_ordering = ("-pub_date", "-id")
+    invalid_cursor_message = "Invalid cursor"
+    unordered_cursor_message = (
+        "Cursor pagination is only available in feed order; "
+        "use page numbers with search."
+    )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        if tuple(queryset.query.order_by) != self.cursor_ordering:
+            raise ValidationError(
+                {self.cursor_query_param: self.unordered_cursor_message}
+            )
+        position = self.decode_cursor(request.query_params[self.cursor_query_param])
+        if position is not None:
+            pub_date, pk = position
+            # The OR alone is only a filter; the redundant ``pub_date <=``
+            # gives PostgreSQL an index range to start the scan from.
+            queryset = queryset.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=pk),
+                pub_date__lte=pub_date,
+            )
+        page = list(queryset[: page_size + 1])
+        self.next_position = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_position = (page[-1].pub_date, page[-1].pk)
+        return page
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if self.next_position is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.next_position),
+        )
+
+    def encode_cursor(self, position):
+        pub_date, pk = position
+        raw = f"{pub_date.isoformat()}|{pk}".encode()
+        return urlsafe_b64encode(raw).decode()
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None
+        try:
+            pub_date, pk = urlsafe_b64decode(cursor.encode()).decode().split("|")
+            return datetime.fromisoformat(pub_date), int(pk)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
@@ -1,8 +1,9 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from drf_extra_fields.fields import Base64ImageField
 from django.db import transaction
 
+from recipes import counters, shopping_list
+from recipes.images import rendition_url, rendition_urls
 from recipes.models import (
     Ingredient,
     RecipeIngredient,
@@ -10,6 +11,9 @@ from recipes.models import (
     Favorite,
     ShoppingCart,
 )
+from recipes.timing import measure
+
+from .fields import ImageUploadField
 
 User = get_user_model()
 
@@ -18,24 +22,53 @@ MIN_AMOUNT = 1
 MAX_AMOUNT = 32_000
 MIN_COOKING_TIME = 1
 MAX_COOKING_TIME = 32_000
+MAX_BULK_IDS = 100
+
+
+class TimedSerializerMixin:
+    """Count ``to_representation`` towards the request's serialize time."""
+
+    def to_representation(self, instance):
+        with measure("serialize"):
+            return super().to_representation(instance)
+
 
+class AbsoluteUrlMixin:
+    """Image URLs built against the request, like the user avatar."""
 
-class IngredientSerializer(serializers.ModelSerializer):
+    def absolute_url(self, url):
+        request = self.context.get("request")
+        if url and request:
+            return request.build_absolute_uri(url)
+        return url
+
+    def get_images(self, obj):
+        return {
+            label: {
+                file_format: self.absolute_url(url)
+                for file_format, url in formats.items()
+            }
+            for label, formats in rendition_urls(obj).items()
+        }
+
+
+class IngredientSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Ingredient
         fields = ("id", "name", "measurement_unit")
 
 
 class AvatarSerializer(serializers.ModelSerializer):
-    avatar = Base64ImageField(required=True)
+    avatar = ImageUploadField(required=True)
 
     class Meta:
         model = User
         fields = ("avatar",)
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
+    avatar = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -49,10 +82,19 @@ class UserSerializer(serializers.ModelSerializer):
             "is_subscribed",
         )
 
+    def get_avatar(self, obj):
+        url = rendition_url(obj, "thumbnail")
+        request = self.context.get("request")
+        if url and request:
+            return request.build_absolute_uri(url)
+        return url or None
+
     def get_is_subscribed(self, obj):
         request = self.context.get("request")
         if not request or request.user.is_anonymous:
             return False
+        if hasattr(obj, "is_subscribed"):
+            return obj.is_subscribed
         return obj.followers.filter(user=request.user).exists()
 
 
@@ -66,18 +108,23 @@ class RecipeIngredientReadSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "measurement_unit", "amount")
 
 
-class RecipeMiniSerializer(serializers.ModelSerializer):
+class RecipeMiniSerializer(
+    AbsoluteUrlMixin, TimedSerializerMixin, serializers.ModelSerializer
+):
     image = serializers.SerializerMethodField()
+    images = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
-        fields = ("id", "name", "image", "cooking_time")
+        fields = ("id", "name", "image", "images", "cooking_time")
 
     def get_image(self, obj):
-        return obj.image.url if obj.image else ""
+        return self.absolute_url(rendition_url(obj, "thumbnail"))
 
 
-class RecipeReadSerializer(serializers.ModelSerializer):
+class RecipeReadSerializer(
+    AbsoluteUrlMixin, TimedSerializerMixin, serializers.ModelSerializer
+):
     author = UserSerializer(read_only=True)
     ingredients = RecipeIngredientReadSerializer(
         source="recipe_ingredients", many=True, read_only=True
@@ -85,6 +132,7 @@ class RecipeReadSerializer(serializers.ModelSerializer):
     is_favorited = serializers.BooleanField(read_only=True)
     is_in_shopping_cart = serializers.BooleanField(read_only=True)
     image = serializers.SerializerMethodField()
+    images = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
@@ -96,12 +144,20 @@ class RecipeReadSerializer(serializers.ModelSerializer):
             "is_in_shopping_cart",
             "name",
             "image",
+            "images",
             "text",
             "cooking_time",
         )
 
     def get_image(self, obj):
-        return obj.image.url if obj.image else ""
+        return self.absolute_url(
+            rendition_url(obj, self.context.get("image_rendition", "card"))
+        )
+
+    def to_representation(self, instance):
+        if hasattr(instance, "author_is_subscribed"):
+            instance.author.is_subscribed = instance.author_is_subscribed
+        return super().to_representation(instance)
 
 
 class RecipeIngredientWriteSerializer(serializers.ModelSerializer):
@@ -117,7 +173,7 @@ class RecipeIngredientWriteSerializer(serializers.ModelSerializer):
 
 class RecipeWriteSerializer(serializers.ModelSerializer):
     ingredients = RecipeIngredientWriteSerializer(many=True, allow_empty=False)
-    image = Base64ImageField()
+    image = ImageUploadField()
     cooking_time = serializers.IntegerField(
         min_value=MIN_COOKING_TIME, max_value=MAX_COOKING_TIME
     )
@@ -153,8 +209,9 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         user = self.context["request"].user
         recipe = Recipe.objects.create(author=user, **validated_data)
         self.create_ingredients(recipe, ingredients)
+        counters.adjust(User, user.pk, recipes_count=1)
 
-        recipe = Recipe.objects.with_user_annotations(user).get(pk=recipe.pk)
+        recipe = Recipe.objects.for_read(user).get(pk=recipe.pk)
 
         return recipe
 
@@ -174,8 +231,14 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             setattr(instance, attr, value)
 
         if ingredients is not None:
+            old_amounts = shopping_list.recipe_amounts(instance)
             instance.recipe_ingredients.all().delete()
             self.create_ingredients(instance, ingredients)
+            shopping_list.change_recipe(
+                instance,
+                old_amounts,
+                {item["ingredient"].id: item["amount"] for item in ingredients},
+            )
 
         instance.save()
 
@@ -191,15 +254,28 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
 
 class FollowSerializer(UserSerializer):
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.IntegerField(source="recipes.count", read_only=True)
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta(UserSerializer.Meta):
         fields = UserSerializer.Meta.fields + ("recipes", "recipes_count")
 
     def get_recipes(self, obj):
-        request = self.context.get("request")
-        limit = request.query_params.get("recipes_limit")
-        queryset = obj.recipes.all()
-        if limit and limit.isdigit():
-            queryset = queryset[: int(limit)]
+        queryset = getattr(obj, "recipe_preview", None)
+        if queryset is None:
+            request = self.context.get("request")
+            limit = request.query_params.get("recipes_limit")
+            queryset = obj.recipes.all()
+            if limit and limit.isdigit():
+                queryset = queryset[: int(limit)]
         return RecipeMiniSerializer(queryset, many=True, context=self.context).data
+
+
+class BulkIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BULK_IDS,
+    )
+
+    def validate_ids(self, value):
+        return list(dict.fromkeys(value))
@@ -0,0 +1,125 @@
+import time
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api.caching import (
+    anonymous_cache_key,
+    conditional_validators,
+    normalized_query,
+)
+from recipes.cache import GLOBAL_SCOPE, VERSION_KEY
+from recipes import search
+from recipes.models import Ingredient, Recipe
+from users.models import User
+
+LOCAL_CACHE = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "api-tests",
+    }
+}
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class CacheKeyTests(SimpleTestCase):
+    def request(self, url):
+        request = APIRequestFactory().get(url)
+        request.user = AnonymousUser()
+        return request
+
+    def test_normalized_query_is_sorted(self):
+        self.assertEqual(
+            normalized_query(self.request("/api/recipes/?limit=6&author=1")),
+            "author=1&limit=6",
+        )
+
+    def test_blank_cursor_is_kept(self):
+        plain = self.request("/api/recipes/")
+        cursor = self.request("/api/recipes/?cursor=")
+        self.assertNotEqual(
+            anonymous_cache_key(plain, GLOBAL_SCOPE),
+            anonymous_cache_key(cursor, GLOBAL_SCOPE),
+        )
+        self.assertNotEqual(
+            conditional_validators(plain, GLOBAL_SCOPE, "json")[0],
+            conditional_validators(cursor, GLOBAL_SCOPE, "json")[0],
+        )
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class AnonymousCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(
+            username="author",
+            email="author@example.com",
+            first_name="Author",
+            last_name="Author",
+        )
+        Recipe.objects.bulk_create(
+            Recipe(
+                author=author,
+                name=f"recipe{i}",
+                text="text",
+                image="recipes/images/recipe.png",
+                cooking_time=10,
+            )
+            for i in range(3)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_page_and_cursor_responses_are_cached_apart(self):
+        client = APIClient()
+        self.assertIn("count", client.get("/api/recipes/").data)
+        response = client.get("/api/recipes/?cursor=")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertNotIn("count", response.data)
+
+    def test_if_modified_since(self):
+        client = APIClient()
+        cache.set(
+            VERSION_KEY.format(scope=GLOBAL_SCOPE),
+            time.time_ns() // 1000 - 10_000_000,
+            timeout=None,
+        )
+        last_modified = client.get("/api/recipes/")["Last-Modified"]
+        response = client.get("/api/recipes/", HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+        # A change within the current second sends no Last-Modified yet.
+        with self.captureOnCommitCallbacks(execute=True):
+            Recipe.objects.first().save()
+        response = client.get("/api/recipes/", HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Last-Modified", response)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class IngredientEtagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Ingredient.objects.create(name="salt", measurement_unit="g")
+
+    def setUp(self):
+        cache.clear()
+        self.enterContext(mock.patch.object(search, "cache_is_shared", lambda: True))
+
+    def test_index_version_is_read_once(self):
+        client = APIClient()
+        with mock.patch.object(
+            search, "get_version", wraps=search.get_version
+        ) as get_version:
+            response = client.get("/api/ingredients/?name=sa")
+        self.assertEqual(get_version.call_count, 1)
+        self.assertEqual(len(response.data), 1)
+
+        response = client.get(
+            "/api/ingredients/?name=sa", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 304)
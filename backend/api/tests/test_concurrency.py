@@ -0,0 +1,188 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+
+from django.db import connection
+from django.test import (
+    TransactionTestCase,
+    override_settings,
+    skipUnlessDBFeature,
+)
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingListItem,
+)
+from users.models import Follow, User
+
+NO_CACHE = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+
+@skipUnlessDBFeature("has_select_for_update")
+@override_settings(CACHES=NO_CACHE)
+class ConcurrentToggleTests(TransactionTestCase):
+    """The same toggle sent many times at once succeeds exactly once.
+
+    Needs row locks, so it only runs on PostgreSQL. The rejected calls
+    cost a fixed number of queries too: they do not retry or fall back.
+    """
+
+    workers = 8
+
+    def setUp(self):
+        self.user = User.objects.create(
+            username="user",
+            email="user@example.com",
+            first_name="User",
+            last_name="User",
+        )
+        self.author = User.objects.create(
+            username="author",
+            email="author@example.com",
+            first_name="Author",
+            last_name="Author",
+        )
+        self.recipe = Recipe.objects.create(
+            author=self.author,
+            name="recipe",
+            text="text",
+            image="recipes/images/recipe.png",
+            image_renditions={"source": "recipes/images/recipe.png"},
+            cooking_time=10,
+        )
+        ingredient = Ingredient.objects.create(name="salt", measurement_unit="g")
+        RecipeIngredient.objects.create(
+            recipe=self.recipe, ingredient=ingredient, amount=5
+        )
+
+    def hammer(self, method, url, bulk_url=None, ids=None):
+        """(status, query count) of each of ``workers`` simultaneous calls.
+
+        With ``bulk_url``, every other call goes there with ``ids`` instead;
+        its status is then that of the only id.
+        """
+        barrier = Barrier(self.workers)
+
+        def call(index):
+            client = APIClient(raise_request_exception=False)
+            client.force_authenticate(self.user)
+            bulk = bulk_url is not None and index % 2
+            try:
+                barrier.wait()
+                with CaptureQueriesContext(connection) as queries:
+                    if bulk:
+                        response = getattr(client, method)(
+                            bulk_url, {"ids": ids}, format="json"
+                        )
+                    else:
+                        response = getattr(client, method)(url)
+                if bulk and response.status_code == 200:
+                    return response.data["results"][0]["status"], len(queries)
+                return response.status_code, len(queries)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(self.workers) as executor:
+            return list(executor.map(call, range(self.workers)))
+
+    def assertMixedToggled(self, results, success, bulk_success):
+        outcomes = [outcome for outcome, _ in results]
+        self.assertNotIn(500, outcomes)
+        self.assertEqual(outcomes.count(success) + outcomes.count(bulk_success), 1)
+
+    def assertToggled(self, results, success, queries):
+        statuses = [status for status, _ in results]
+        self.assertNotIn(500, statuses)
+        self.assertEqual(statuses.count(success), 1)
+        self.assertEqual(statuses.count(400), self.workers - 1)
+        for status, count in results:
+            self.assertEqual(count, queries[status], status)
+
+    def test_favorite(self):
+        url = f"/api/recipes/{self.recipe.pk}/favorite/"
+        self.assertToggled(self.hammer("post", url), 201, {201: 5, 400: 4})
+        self.assertEqual(Favorite.objects.count(), 1)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 1)
+
+        self.assertToggled(self.hammer("delete", url), 204, {204: 4, 400: 4})
+        self.assertFalse(Favorite.objects.exists())
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 0)
+
+    def test_shopping_cart(self):
+        url = f"/api/recipes/{self.recipe.pk}/shopping_cart/"
+        self.assertToggled(self.hammer("post", url), 201, {201: 9, 400: 5})
+        self.assertEqual(ShoppingCart.objects.count(), 1)
+        self.assertEqual(
+            list(ShoppingListItem.objects.values_list("total_amount", flat=True)),
+            [5],
+        )
+
+        self.assertToggled(self.hammer("delete", url), 204, {204: 8, 400: 5})
+        self.assertFalse(ShoppingCart.objects.exists())
+        self.assertFalse(ShoppingListItem.objects.exists())
+
+    def test_subscribe(self):
+        url = f"/api/users/{self.author.pk}/subscribe/"
+        self.assertToggled(self.hammer("post", url), 201, {201: 6, 400: 5})
+        self.assertEqual(Follow.objects.count(), 1)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 1)
+
+        self.assertToggled(self.hammer("delete", url), 204, {204: 4, 400: 4})
+        self.assertFalse(Follow.objects.exists())
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 0)
+
+    def test_favorite_single_and_bulk(self):
+        url = f"/api/recipes/{self.recipe.pk}/favorite/"
+        bulk_url = "/api/recipes/favorite/bulk/"
+        for method, success, bulk_success, count in (
+            ("post", 201, "added", 1),
+            ("delete", 204, "removed", 0),
+        ):
+            with self.subTest(method=method):
+                results = self.hammer(method, url, bulk_url, [self.recipe.pk])
+                self.assertMixedToggled(results, success, bulk_success)
+                self.assertEqual(Favorite.objects.count(), count)
+                self.recipe.refresh_from_db()
+                self.assertEqual(self.recipe.favorites_count, count)
+
+    def test_shopping_cart_single_and_bulk(self):
+        url = f"/api/recipes/{self.recipe.pk}/shopping_cart/"
+        bulk_url = "/api/recipes/shopping_cart/bulk/"
+        for method, success, bulk_success, amounts in (
+            ("post", 201, "added", [5]),
+            ("delete", 204, "removed", []),
+        ):
+            with self.subTest(method=method):
+                results = self.hammer(method, url, bulk_url, [self.recipe.pk])
+                self.assertMixedToggled(results, success, bulk_success)
+                self.recipe.refresh_from_db()
+                self.assertEqual(self.recipe.in_carts_count, len(amounts))
+                self.assertEqual(
+                    list(
+                        ShoppingListItem.objects.values_list("total_amount", flat=True)
+                    ),
+                    amounts,
+                )
+
+    def test_subscribe_single_and_bulk(self):
+        url = f"/api/users/{self.author.pk}/subscribe/"
+        bulk_url = "/api/users/subscribe/bulk/"
+        for method, success, bulk_success, count in (
+            ("post", 201, "added", 1),
+            ("delete", 204, "removed", 0),
+        ):
+            with self.subTest(method=method):
+                results = self.hammer(method, url, bulk_url, [self.author.pk])
+                self.assertMixedToggled(results, success, bulk_success)
+                self.assertEqual(Follow.objects.count(), count)
+                self.author.refresh_from_db()
+                self.assertEqual(self.author.followers_count, count)
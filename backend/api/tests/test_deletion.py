@@ -0,0 +1,96 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes import relations
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingListItem,
+)
+from users.models import Follow, User
+
+NO_CACHE = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+
+@override_settings(CACHES=NO_CACHE)
+class DeletionTests(TestCase):
+    """Deleting recipes and users keeps lists and counters of others right."""
+
+    def setUp(self):
+        self.author, self.reader, self.other = (
+            User.objects.create_user(
+                username=name,
+                email=f"{name}@example.com",
+                first_name=name,
+                last_name=name,
+                password="a-password",
+            )
+            for name in ("author", "reader", "other")
+        )
+        salt = Ingredient.objects.create(name="salt", measurement_unit="g")
+        self.recipe = self.create_recipe(self.author, salt, 5)
+        self.other_recipe = self.create_recipe(self.other, salt, 2)
+        for recipe in (self.recipe, self.other_recipe):
+            relations.add_recipe(ShoppingCart, self.reader, recipe)
+            relations.add_recipe(Favorite, self.reader, recipe)
+        relations.follow(self.reader, self.author)
+        relations.follow(self.reader, self.other)
+        relations.follow(self.other, self.author)
+
+    def create_recipe(self, author, ingredient, amount):
+        recipe = Recipe.objects.create(
+            author=author,
+            name=f"{author.username} recipe",
+            text="text",
+            image="recipes/images/recipe.png",
+            image_renditions={"source": "recipes/images/recipe.png"},
+            cooking_time=10,
+        )
+        RecipeIngredient.objects.create(
+            recipe=recipe, ingredient=ingredient, amount=amount
+        )
+        User.objects.filter(pk=author.pk).update(recipes_count=1)
+        return recipe
+
+    def shopping_list(self, user):
+        return list(
+            ShoppingListItem.objects.filter(user=user).values_list(
+                "ingredient__name", "total_amount"
+            )
+        )
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_recipe_delete(self):
+        response = self.client_for(self.author).delete(
+            f"/api/recipes/{self.recipe.pk}/"
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.shopping_list(self.reader), [("salt", 2)])
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 0)
+
+    def test_author_delete_cascades_out_of_carts(self):
+        response = self.client_for(self.author).delete(
+            f"/api/users/{self.author.pk}/", {"current_password": "a-password"}
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(ShoppingCart.objects.filter(recipe=self.recipe).exists())
+        self.assertEqual(self.shopping_list(self.reader), [("salt", 2)])
+
+    def test_reader_delete_releases_counters(self):
+        self.reader.delete()
+        self.other_recipe.refresh_from_db()
+        self.assertEqual(self.other_recipe.favorites_count, 0)
+        self.assertEqual(self.other_recipe.in_carts_count, 0)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 1)
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.followers_count, 0)
+        self.assertEqual(Follow.objects.count(), 1)
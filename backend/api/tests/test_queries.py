@@ -0,0 +1,113 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+)
+from users.models import Follow, User
+
+NO_CACHE = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+
+@override_settings(CACHES=NO_CACHE)
+class RecipeReadQueriesTests(TestCase):
+    """List and detail cost the same number of queries at any page size.
+
+    The response cache is disabled and no validators are sent, so every
+    request runs the view.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.authors = User.objects.bulk_create(
+            User(
+                username=f"author{i}",
+                email=f"author{i}@example.com",
+                first_name="Author",
+                last_name=str(i),
+            )
+            for i in range(5)
+        )
+        cls.reader = User.objects.create_user(
+            username="reader",
+            email="reader@example.com",
+            first_name="Reader",
+            last_name="Reader",
+            password="reader-password",
+        )
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f"ingredient{i}", measurement_unit="g") for i in range(10)
+        )
+        recipes = Recipe.objects.bulk_create(
+            Recipe(
+                author=cls.authors[i % len(cls.authors)],
+                name=f"recipe{i}",
+                text="text",
+                image="recipes/images/recipe.png",
+                cooking_time=10,
+            )
+            for i in range(60)
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=1)
+            for recipe in recipes
+            for ingredient in ingredients[:3]
+        )
+        Favorite.objects.bulk_create(
+            Favorite(user=cls.reader, recipe=recipe) for recipe in recipes[::2]
+        )
+        ShoppingCart.objects.bulk_create(
+            ShoppingCart(user=cls.reader, recipe=recipe) for recipe in recipes[::3]
+        )
+        Follow.objects.create(user=cls.reader, author=cls.authors[0])
+        cls.recipe = recipes[0]
+
+    def setUp(self):
+        self.anonymous = APIClient()
+        self.authenticated = APIClient()
+        self.authenticated.force_authenticate(self.reader)
+
+    def get(self, client, url, queries):
+        with self.assertNumQueries(queries):
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_list_anonymous(self):
+        for limit in (6, 50):
+            with self.subTest(limit=limit):
+                response = self.get(self.anonymous, f"/api/recipes/?limit={limit}", 3)
+                self.assertEqual(len(response.data["results"]), limit)
+
+    def test_list_authenticated(self):
+        for limit in (6, 50):
+            with self.subTest(limit=limit):
+                response = self.get(
+                    self.authenticated, f"/api/recipes/?limit={limit}", 3
+                )
+                self.assertEqual(len(response.data["results"]), limit)
+
+    def test_retrieve_anonymous(self):
+        self.get(self.anonymous, f"/api/recipes/{self.recipe.pk}/", 2)
+
+    def test_retrieve_authenticated(self):
+        response = self.get(self.authenticated, f"/api/recipes/{self.recipe.pk}/", 2)
+        self.assertTrue(response.data["is_favorited"])
+        self.assertTrue(response.data["is_in_shopping_cart"])
+        self.assertTrue(response.data["author"]["is_subscribed"])
+
+    def test_cursor_pages_walk_the_feed(self):
+        expected = list(
+            Recipe.objects.order_by("-pub_date", "-id").values_list("pk", flat=True)
+        )
+        seen = []
+        url = "/api/recipes/?cursor=&limit=7"
+        while url:
+            response = self.get(self.anonymous, url, 2)
+            seen.extend(recipe["id"] for recipe in response.data["results"])
+            url = response.data["next"]
+        self.assertEqual(seen, expected)
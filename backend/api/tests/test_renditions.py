@@ -0,0 +1,67 @@
+import io
+import tempfile
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from recipes import images
+from recipes.models import MediaFile, Recipe
+from users.models import User
+
+
+class RenditionFailureTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(
+            override_settings(
+                MEDIA_ROOT=media_root.name,
+                STORAGES={
+                    "default": {"BACKEND": "recipes.storage.ContentAddressedStorage"},
+                    "staticfiles": {
+                        "BACKEND": "django.contrib.staticfiles.storage."
+                        "StaticFilesStorage"
+                    },
+                },
+            )
+        )
+        buffer = io.BytesIO()
+        Image.new("RGB", (64, 64), "red").save(buffer, "PNG")
+        self.source = default_storage.save(
+            "recipes/images/recipe.png", ContentFile(buffer.getvalue())
+        )
+        author = User.objects.create(
+            username="author",
+            email="author@example.com",
+            first_name="Author",
+            last_name="Author",
+        )
+        self.recipe = Recipe.objects.create(
+            author=author,
+            name="recipe",
+            text="text",
+            image=self.source,
+            cooking_time=10,
+        )
+
+    def test_partial_renditions_are_released(self):
+        render = images.render
+        calls = []
+
+        def failing_render(image, size):
+            calls.append(size)
+            if len(calls) > 1:
+                raise OSError("disk full")
+            return render(image, size)
+
+        with mock.patch.object(images, "render", failing_render):
+            images.build_renditions(Recipe, self.recipe.pk)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_renditions, {"source": self.source})
+        self.assertEqual(
+            dict(MediaFile.objects.values_list("name", "refs")), {self.source: 1}
+        )
@@ -1,6 +1,6 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
-from .views import IngredientViewSet, RecipeViewSet, UserViewSet
+from .views import IngredientViewSet, RecipeViewSet, UserViewSet, db_pool_stats
 
 
 router = DefaultRouter()
@@ -11,4 +11,5 @@ router.register("users", UserViewSet, basename="users")
 urlpatterns = [
     path("", include(router.urls)),
     path("auth/", include("djoser.urls.authtoken")),
+    path("health/db-pool/", db_pool_stats, name="db-pool-stats"),
 ]
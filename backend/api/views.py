@@ -1,5 +1,8 @@
+import hashlib
+
 from .serializers import (
     AvatarSerializer,
+    BulkIdsSerializer,
     FollowSerializer,
     IngredientSerializer,
     RecipeMiniSerializer,
@@ -12,25 +15,64 @@ from recipes.models import (
     Ingredient,
     Recipe,
     ShoppingCart,
-    RecipeIngredient,
 )
-from users.models import Follow, User
+from recipes import relations, shortlinks
+from recipes.db import pool_stats
+from recipes.search import ingredient_index, search_ingredients
+from users.models import User
 from rest_framework import status, viewsets
 from rest_framework.permissions import (
     AllowAny,
+    IsAdminUser,
     IsAuthenticated,
     IsAuthenticatedOrReadOnly,
 )
 from django_filters.rest_framework import DjangoFilterBackend
+from .caching import AnonymousCacheMixin, ConditionalGetMixin
+from .exports import EXPORT_FORMATS, shopping_list_response
 from .filters import IngredientFilter, RecipeFilter
-from .pagination import StandardResultsSetPagination
+from .pagination import RecipeFeedPagination, StandardResultsSetPagination
 from .permissions import IsCreatorOrReadOnly
 from djoser.views import UserViewSet as DjoserUserViewSet
 from rest_framework.response import Response
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
 from django.shortcuts import get_object_or_404
-from django.db.models import Count, Sum
-from django.http import HttpResponse
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.db.models import BooleanField, Prefetch, Value
+from django.http import Http404, HttpResponseRedirect
+from django.urls import reverse
+
+
+def bulk_relation_response(request, add, remove, *args):
+    serializer = BulkIdsSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    ids = serializer.validated_data["ids"]
+    handler = add if request.method == "POST" else remove
+    statuses = handler(*args, request.user, ids)
+    return Response({"results": [{"id": pk, "status": statuses[pk]} for pk in ids]})
+
+
+def ingredient_etag(snapshot, name):
+    raw = "|".join(
+        (
+            snapshot.digest,
+            name.strip().lower(),
+            str(settings.INGREDIENT_SEARCH_LIMIT),
+        )
+    )
+    return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+
+def with_recipe_preview(queryset, recipes_limit=None):
+    recipes = Recipe.objects.order_by("-pub_date", "-id")
+    if recipes_limit and recipes_limit.isdigit():
+        # A sliced prefetch is a ROW_NUMBER() window partitioned by author.
+        recipes = recipes[: int(recipes_limit)]
+    return queryset.annotate(
+        is_subscribed=Value(True, output_field=BooleanField()),
+    ).prefetch_related(Prefetch("recipes", queryset=recipes, to_attr="recipe_preview"))
 
 
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
@@ -41,17 +83,36 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = [DjangoFilterBackend]
     filterset_class = IngredientFilter
 
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get("name", "")
+        snapshot = ingredient_index.snapshot()
+        etag = ingredient_etag(snapshot, name)
+        response = get_conditional_response(request, etag=etag) or Response(
+            search_ingredients(name, snapshot=snapshot)
+        )
+        response["ETag"] = etag
+        return response
+
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConditionalGetMixin, AnonymousCacheMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticatedOrReadOnly, IsCreatorOrReadOnly]
     filter_backends = [DjangoFilterBackend]
     filterset_class = RecipeFilter
-    pagination_class = StandardResultsSetPagination
+    pagination_class = RecipeFeedPagination
 
     def get_queryset(self):
-        return Recipe.objects.with_user_annotations(self.request.user).order_by(
-            "-pub_date"
-        )
+        user = self.request.user
+        if self.action in ("list", "retrieve"):
+            queryset = Recipe.objects.for_read(user)
+        else:
+            queryset = Recipe.objects.with_user_annotations(user)
+        return queryset.order_by("-pub_date", "-id")
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == "retrieve":
+            context["image_rendition"] = "full"
+        return context
 
     def get_serializer_class(self):
         if self.action in ("list", "retrieve"):
@@ -74,66 +135,77 @@ class RecipeViewSet(viewsets.ModelViewSet):
         serializer.save()
         return Response(serializer.data, status=status.HTTP_200_OK)
 
-    @action(
-        detail=True, methods=["post", "delete"], permission_classes=[IsAuthenticated]
-    )
-    def favorite(self, request, pk=None):
-        user = request.user
-        recipe = get_object_or_404(Recipe, pk=pk)
-
+    def toggle_relation(self, request, pk, model, present_error, absent_error):
         if request.method == "DELETE":
-            favorite_relation = user.favorite_relations.filter(recipe=recipe)
-            if favorite_relation.exists():
-                favorite_relation.delete()
+            if relations.remove_recipe(model, request.user, pk):
                 return Response(status=status.HTTP_204_NO_CONTENT)
+            get_object_or_404(Recipe, pk=pk)
             return Response(
-                {"errors": "Рецепт не в избранном"}, status=status.HTTP_400_BAD_REQUEST
+                {"errors": absent_error}, status=status.HTTP_400_BAD_REQUEST
             )
-        if user.favorite_relations.filter(recipe=recipe).exists():
+
+        recipe = get_object_or_404(Recipe, pk=pk)
+        if not relations.add_recipe(model, request.user, recipe):
             return Response(
-                {"errors": "Рецепт уже в избранном."},
-                status=status.HTTP_400_BAD_REQUEST,
+                {"errors": present_error}, status=status.HTTP_400_BAD_REQUEST
             )
-
-        Favorite.objects.create(user=user, recipe=recipe)
         serializer = RecipeMiniSerializer(recipe, context={"request": request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @action(
         detail=True, methods=["post", "delete"], permission_classes=[IsAuthenticated]
     )
-    def shopping_cart(self, request, pk=None):
-        user = request.user
-        recipe = get_object_or_404(Recipe, pk=pk)
+    def favorite(self, request, pk=None):
+        return self.toggle_relation(
+            request,
+            pk,
+            Favorite,
+            present_error="Рецепт уже в избранном.",
+            absent_error="Рецепт не в избранном",
+        )
 
-        if request.method == "DELETE":
-            cart_item = user.shopping_cart.filter(recipe=recipe)
-            if cart_item.exists():
-                cart_item.delete()
-                return Response(status=status.HTTP_204_NO_CONTENT)
-            return Response(
-                {"errors": "Рецепт не в корзине"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+    @action(
+        detail=True, methods=["post", "delete"], permission_classes=[IsAuthenticated]
+    )
+    def shopping_cart(self, request, pk=None):
+        return self.toggle_relation(
+            request,
+            pk,
+            ShoppingCart,
+            present_error="Рецепт уже в списке покупок.",
+            absent_error="Рецепт не в корзине",
+        )
 
-        if user.shopping_cart.filter(recipe=recipe).exists():
-            return Response(
-                {"errors": "Рецепт уже в списке покупок."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+    @action(
+        detail=False,
+        methods=["post", "delete"],
+        permission_classes=[IsAuthenticated],
+        url_path="favorite/bulk",
+    )
+    def bulk_favorite(self, request):
+        return bulk_relation_response(
+            request, relations.add_recipes, relations.remove_recipes, Favorite
+        )
 
-        ShoppingCart.objects.create(user=user, recipe=recipe)
-        serializer = RecipeMiniSerializer(recipe, context={"request": request})
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    @action(
+        detail=False,
+        methods=["post", "delete"],
+        permission_classes=[IsAuthenticated],
+        url_path="shopping_cart/bulk",
+    )
+    def bulk_shopping_cart(self, request):
+        return bulk_relation_response(
+            request, relations.add_recipes, relations.remove_recipes, ShoppingCart
+        )
 
     @action(
         detail=True, methods=["get"], permission_classes=[AllowAny], url_path="get-link"
     )
     def get_link(self, request, pk=None):
         recipe = self.get_object()
-        recipe_path = f"/api/recipes/{recipe.pk}/"
+        code = shortlinks.code_for(recipe.pk)
         try:
-            link = request.build_absolute_uri(recipe_path)
+            link = request.build_absolute_uri(reverse("short-link", args=[code]))
             response_data = {"short-link": link}
             return Response(response_data, status=status.HTTP_200_OK)
         except Exception:
@@ -142,28 +214,20 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-    @action(detail=False, methods=["get"], url_path="download_shopping_cart")
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=[IsAuthenticated],
+        url_path="download_shopping_cart",
+    )
     def download_shopping_cart(self, request):
-        user = request.user
-
-        recipes = Recipe.objects.filter(shopping_cart__user=user)
-
-        ingredients = (
-            RecipeIngredient.objects.filter(recipe__in=recipes)
-            .values("ingredient__name", "ingredient__measurement_unit")
-            .annotate(total_amount=Sum("amount"))
-            .order_by("ingredient__name")
-        )
-
-        lines = [
-            f"{item['ingredient__name']} ({item['ingredient__measurement_unit']}) — {item['total_amount']}"
-            for item in ingredients
-        ]
-        content = "\n".join(lines)
-
-        response = HttpResponse(content, content_type="text/plain")
-        response["Content-Disposition"] = 'attachment; filename="shopping_cart.txt"'
-        return response
+        file_format = request.query_params.get("file_format", "txt")
+        if file_format not in EXPORT_FORMATS:
+            return Response(
+                {"errors": f"Unsupported format: {file_format}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return shopping_list_response(request, file_format)
 
 
 class UserViewSet(DjoserUserViewSet):
@@ -171,6 +235,11 @@ class UserViewSet(DjoserUserViewSet):
     permission_classes = [AllowAny]
     pagination_class = StandardResultsSetPagination
 
+    def with_recipe_preview(self, queryset):
+        return with_recipe_preview(
+            queryset, self.request.query_params.get("recipes_limit")
+        )
+
     @action(
         detail=False,
         methods=["get"],
@@ -190,11 +259,9 @@ class UserViewSet(DjoserUserViewSet):
         serializer_class=FollowSerializer,
     )
     def subscriptions(self, request):
-        queryset = (
+        queryset = self.with_recipe_preview(
             User.objects.filter(followers__user=request.user)
-            .annotate(recipes_count=Count("recipes"))
-            .order_by("username")
-        )
+        ).order_by("username")
 
         page = self.paginate_queryset(queryset)
         serializer = self.get_serializer(page, many=True, context={"request": request})
@@ -204,31 +271,42 @@ class UserViewSet(DjoserUserViewSet):
         detail=True, methods=["post", "delete"], permission_classes=[IsAuthenticated]
     )
     def subscribe(self, request, id=None):
-        author = get_object_or_404(User, id=id)
-
-        if request.user == author:
+        if str(request.user.pk) == str(id):
             return Response(
                 {"errors": "You cannot subscribe to yourself."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
         if request.method == "POST":
-            if request.user.following.filter(author=author).exists():
+            author = get_object_or_404(
+                self.with_recipe_preview(User.objects.all()), id=id
+            )
+            if not relations.follow(request.user, author):
                 return Response(
                     {"errors": "You are already subscribed to this author."},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            Follow.objects.create(user=request.user, author=author)
             serializer = FollowSerializer(author, context={"request": request})
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        if not request.user.following.filter(author=author).exists():
-            return Response(
-                {"errors": "You are not subscribed to this author."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        request.user.following.filter(author=author).delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        if relations.unfollow(request.user, id):
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        get_object_or_404(User, id=id)
+        return Response(
+            {"errors": "You are not subscribed to this author."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    @action(
+        detail=False,
+        methods=["post", "delete"],
+        permission_classes=[IsAuthenticated],
+        url_path="subscribe/bulk",
+    )
+    def bulk_subscribe(self, request):
+        return bulk_relation_response(
+            request, relations.follow_authors, relations.unfollow_authors
+        )
 
     @action(
         detail=False,
@@ -250,5 +328,26 @@ class UserViewSet(DjoserUserViewSet):
             return Response(
                 {"errors": "Avatar not set."}, status=status.HTTP_400_BAD_REQUEST
             )
-        user.avatar.delete(save=True)
+        user.avatar = None
+        user.save(update_fields=["avatar"])
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def short_link_redirect(request, code):
+    recipe_id = shortlinks.resolve(code)
+    if recipe_id is None:
+        raise Http404
+    shortlinks.hits.add(code)
+    return HttpResponseRedirect(
+        settings.SHORT_LINK_REDIRECT_URL.format(recipe_id=recipe_id)
+    )
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def db_pool_stats(request):
+    """Connection pool counters of the worker that serves the request."""
+    stats = pool_stats()
+    if stats is None:
+        return Response({"pooled": False})
+    return Response({"pooled": True, **stats})
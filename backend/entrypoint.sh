@@ -8,13 +8,10 @@ done
 
 echo "PostgreSQL started"
 
-echo "Running database migrations..."
-python manage.py migrate
-
-python manage.py import_ingridients
-
-echo "Collecting static files..."
-python manage.py collectstatic --no-input
+# Migrations, the ingredient import and collectstatic only run when their
+# inputs changed; see recipes/management/commands/startup.py.
+python manage.py startup
 
+# Worker model and counts come from gunicorn.conf.py (see SERVER_PROFILE).
 echo "Starting Gunicorn..."
-exec gunicorn foodgram.wsgi:application --bind 0.0.0.0:8000
+exec gunicorn --config gunicorn.conf.py
@@ -0,0 +1,20 @@
+from django.urls import path
+
+from api import async_views
+
+from .urls import urlpatterns as sync_urlpatterns
+
+# Async views for the hot read endpoints go first; they hand anything else
+# over to the DRF views, which stay routed below. The names match the DRF
+# routes, so both report the same route.
+urlpatterns = [
+    path("api/recipes/", async_views.recipe_list, name="recipes-list"),
+    path("api/recipes/<int:pk>/", async_views.recipe_detail, name="recipes-detail"),
+    path("api/ingredients/", async_views.ingredient_list, name="ingredients-list"),
+    path(
+        "api/users/subscriptions/",
+        async_views.subscriptions,
+        name="users-subscriptions",
+    ),
+    *sync_urlpatterns,
+]
@@ -33,11 +33,14 @@ INSTALLED_APPS = [
     "djoser",
     "django_filters",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "users.apps.UsersConfig",
     "recipes.apps.RecipesConfig",
 ]
 
 MIDDLEWARE = [
+    "recipes.timing.ServerTimingMiddleware",
+    "recipes.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -47,7 +50,11 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
-ROOT_URLCONF = "foodgram.urls"
+# The ASGI entry point turns this on to serve the hot read endpoints with
+# async views (see foodgram/async_urls.py).
+ASYNC_READ_VIEWS = os.getenv("ASYNC_READ_VIEWS", "0") == "1"
+
+ROOT_URLCONF = "foodgram.async_urls" if ASYNC_READ_VIEWS else "foodgram.urls"
 
 TEMPLATES = [
     {
@@ -78,9 +85,42 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD"),
         "HOST": os.getenv("DB_HOST", "localhost"),  # 'db' для Docker
         "PORT": os.getenv("DB_PORT", "5432"),
+        # Seconds a connection is reused across requests; 0 closes it after
+        # every request. Health checks drop broken connections before reuse.
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": os.getenv("DB_CONN_HEALTH_CHECKS", "1") == "1",
+        "OPTIONS": {},
     }
 }
 
+# DB_POOL=1 shares a psycopg 3 connection pool between the threads of a
+# worker instead of keeping one connection per thread. Requires
+# psycopg[pool]; pooled connections are never persistent.
+if os.getenv("DB_POOL", "0") == "1":
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+        "max_size": int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+        "timeout": float(os.getenv("DB_POOL_TIMEOUT", 10)),
+    }
+
+
+# The cache holds the version counters that invalidate cached responses, so
+# it must be shared by every worker process: the default file cache is for a
+# single node; point CACHE_BACKEND at Redis or Memcached for several.
+CACHE_BACKEND = os.getenv(
+    "CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"
+)
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": os.getenv("CACHE_LOCATION", "/tmp/foodgram-cache"),
+    }
+}
+if CACHE_BACKEND.endswith(".FileBasedCache"):
+    CACHES["default"]["OPTIONS"] = {
+        "MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES", 5000)),
+    }
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -105,7 +145,7 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "api.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 6,
@@ -149,3 +189,96 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 MEDIA_URL = "/media/"
 STATIC_ROOT = BASE_DIR / "static"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+
+# Uploads are stored under the SHA-256 of their content and reference
+# counted, so identical files are kept once and never change.
+STORAGES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "MEDIA_STORAGE_BACKEND", "recipes.storage.ContentAddressedStorage"
+        ),
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
+# Ingredients
+INGREDIENTS_DATA_FILE = os.getenv("INGREDIENTS_DATA_FILE", "/app/data/ingredients.csv")
+INGREDIENT_SEARCH_LIMIT = int(os.getenv("INGREDIENT_SEARCH_LIMIT", 50))
+# How often each process reloads its search index when the cache backend is
+# process-local and cannot carry invalidations between processes.
+INGREDIENT_INDEX_RELOAD_INTERVAL = int(
+    os.getenv("INGREDIENT_INDEX_RELOAD_INTERVAL", 60)
+)
+
+# Shopping list export: lists shorter than this are buffered (Content-Length,
+# ETag), longer ones are streamed.
+SHOPPING_LIST_BUFFER_ROWS = int(os.getenv("SHOPPING_LIST_BUFFER_ROWS", 1000))
+
+# Anonymous recipe list/detail responses
+RECIPE_CACHE_TIMEOUT = int(os.getenv("RECIPE_CACHE_TIMEOUT", 300))
+
+# Full-text recipe search (PostgreSQL text search configuration)
+RECIPE_SEARCH_CONFIG = os.getenv("RECIPE_SEARCH_CONFIG", "russian")
+
+# Uploaded images: resized renditions (largest side, px) built after upload,
+# and limits checked against the image header before anything is decoded.
+IMAGE_RENDITIONS = {
+    "thumbnail": 160,
+    "card": 480,
+    "full": 1280,
+}
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", 80))
+IMAGE_MAX_UPLOAD_SIZE = int(os.getenv("IMAGE_MAX_UPLOAD_SIZE", 8 * 1024 * 1024))
+IMAGE_MAX_DIMENSION = int(os.getenv("IMAGE_MAX_DIMENSION", 8000))
+IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", 40_000_000))
+# Background threads per process building renditions; 0 builds them inline.
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 2))
+
+# Short links: resolved codes are kept in a per-process LRU and the shared
+# cache; redirect counts are written to the database in batches.
+SHORT_LINK_REDIRECT_URL = os.getenv("SHORT_LINK_REDIRECT_URL", "/recipes/{recipe_id}")
+SHORT_LINK_LRU_SIZE = int(os.getenv("SHORT_LINK_LRU_SIZE", 10_000))
+SHORT_LINK_CACHE_TIMEOUT = int(os.getenv("SHORT_LINK_CACHE_TIMEOUT", 24 * 60 * 60))
+SHORT_LINK_FLUSH_INTERVAL = int(os.getenv("SHORT_LINK_FLUSH_INTERVAL", 10))
+
+# Token authentication: the token's user is cached in a per-process LRU and,
+# unless the cache backend is process-local, in the shared cache. Revoked
+# tokens and changed users are dropped from both, but other processes keep
+# their local copy for up to the local timeout.
+TOKEN_CACHE_LRU_SIZE = int(os.getenv("TOKEN_CACHE_LRU_SIZE", 10_000))
+TOKEN_CACHE_LOCAL_TIMEOUT = int(os.getenv("TOKEN_CACHE_LOCAL_TIMEOUT", 10))
+TOKEN_CACHE_TIMEOUT = int(os.getenv("TOKEN_CACHE_TIMEOUT", 300))
+
+# Request timings (recipes/timing.py): a Server-Timing header on every
+# response, a sampled share of requests logged, and requests slower than
+# their route's threshold (ms) logged with their most expensive SQL.
+# Per-route thresholds are keyed by URL name: "recipes-list=300,users-me=100".
+SERVER_TIMING_HEADER = os.getenv("SERVER_TIMING_HEADER", "1") == "1"
+SERVER_TIMING_LOG_SAMPLE_RATE = float(os.getenv("SERVER_TIMING_LOG_SAMPLE_RATE", 0.01))
+SLOW_REQUEST_THRESHOLD = int(os.getenv("SLOW_REQUEST_THRESHOLD", 500))
+SLOW_REQUEST_THRESHOLDS = {
+    route: int(threshold)
+    for route, threshold in (
+        item.split("=")
+        for item in os.getenv("SLOW_REQUEST_THRESHOLDS", "").split(",")
+        if item
+    )
+}
+SLOW_REQUEST_TOP_SQL = int(os.getenv("SLOW_REQUEST_TOP_SQL", 5))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "recipes.timing": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
+}
@@ -1,8 +1,14 @@
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from api.views import short_link_redirect
+from recipes.metrics import metrics_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    # Scraped from inside the network; not proxied by nginx.
+    path("metrics", metrics_view, name="metrics"),
+    re_path(r"^s/(?P<code>[0-9A-Za-z]+)/?$", short_link_redirect, name="short-link"),
     path("api/", include("api.urls")),
     path("api/auth/", include("djoser.urls.authtoken")),
     path("api/", include("djoser.urls")),
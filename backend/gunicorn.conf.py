@@ -0,0 +1,102 @@
+"""Gunicorn settings, picked from ``SERVER_PROFILE``.
+
+* unset: one sync worker, as before;
+* ``sync``: ``2 * CPUs + 1`` sync workers;
+* ``gthread``: one worker per CPU with ``GUNICORN_THREADS`` threads each;
+* ``asgi``: one uvicorn worker per CPU serving ``foodgram.asgi``.
+
+Workers share their Prometheus metrics through memory-mapped files in
+``PROMETHEUS_MULTIPROC_DIR``, which is emptied when the server starts.
+
+The tuned profiles preload the application so workers share the imported
+code copy-on-write, and recycle workers after ``GUNICORN_MAX_REQUESTS``
+requests (with jitter, so they do not all restart at once) to bound memory
+growth. ``GUNICORN_WORKERS``, ``GUNICORN_THREADS`` and the other
+``GUNICORN_*`` variables below override the computed values.
+"""
+
+import math
+import os
+import shutil
+
+
+def cpu_count():
+    """CPUs this container may use, honouring a cgroup quota."""
+    count = len(os.sched_getaffinity(0))
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as cpu_max:
+            quota, period = cpu_max.read().split()
+        if quota != "max":
+            count = min(count, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return count
+
+
+def env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+profile = os.getenv("SERVER_PROFILE", "")
+# Must be set before the application (and prometheus_client) is imported.
+metrics_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/foodgram-metrics")
+os.makedirs(metrics_dir, exist_ok=True)
+cpus = cpu_count()
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+wsgi_app = "foodgram.wsgi:application"
+timeout = env_int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = env_int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+keepalive = env_int("GUNICORN_KEEPALIVE", 2)
+
+if profile == "sync":
+    workers = 2 * cpus + 1
+elif profile == "gthread":
+    worker_class = "gthread"
+    workers = cpus
+    threads = env_int("GUNICORN_THREADS", 4)
+elif profile == "asgi":
+    wsgi_app = "foodgram.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+    workers = cpus
+else:
+    workers = 1
+
+workers = env_int("GUNICORN_WORKERS", workers)
+preload_app = os.getenv("GUNICORN_PRELOAD", "1" if profile else "0") == "1"
+max_requests = env_int("GUNICORN_MAX_REQUESTS", 1000 if profile else 0)
+max_requests_jitter = env_int("GUNICORN_MAX_REQUESTS_JITTER", max_requests // 10)
+
+
+def on_starting(server):
+    # Drop the samples of a previous run.
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_fork(server, worker):
+    # Connections opened while preloading must not be shared between workers.
+    if preload_app:
+        from django.db import connections
+
+        connections.close_all()
+
+
+def when_ready(server):
+    server.log.info(
+        "Profile %r: %s %s workers, %s threads, preload %s, max requests %s+%s",
+        profile or "default",
+        workers,
+        server.cfg.worker_class_str,
+        server.cfg.threads,
+        preload_app,
+        max_requests,
+        max_requests_jitter,
+    )
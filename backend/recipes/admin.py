@@ -1,5 +1,16 @@
 from django.contrib import admin
-from .models import Recipe, RecipeIngredient, Ingredient, Favorite, ShoppingCart
+from .cache import UserVersionAdminMixin
+from .counters import CounterSyncAdminMixin
+from .shopping_list import ShoppingListSyncAdminMixin
+from .models import (
+    Recipe,
+    RecipeIngredient,
+    Ingredient,
+    Favorite,
+    ShoppingCart,
+    ShoppingListItem,
+    ShortLink,
+)
 
 
 @admin.register(Ingredient)
@@ -16,26 +27,67 @@ class RecipeIngredientInline(admin.TabularInline):
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
-    list_display = ("id", "name", "author", "cooking_time", "get_favorites_count")
+class RecipeAdmin(ShoppingListSyncAdminMixin, CounterSyncAdminMixin, admin.ModelAdmin):
+    list_display = (
+        "id",
+        "name",
+        "author",
+        "cooking_time",
+        "get_favorites_count",
+        "in_carts_count",
+    )
     search_fields = ("name", "author__username")
     list_filter = ("author",)
+    list_select_related = ("author",)
     inlines = [RecipeIngredientInline]
 
-    @admin.display(description="Favorites Count")
+    @admin.display(description="Favorites Count", ordering="favorites_count")
     def get_favorites_count(self, obj):
-        return obj.favorite_relations.count()
+        return obj.favorites_count
 
+    def counter_targets(self, objs):
+        return (), {obj.author_id for obj in objs}
 
-@admin.register(Favorite)
-class FavoriteAdmin(admin.ModelAdmin):
+    def shopping_list_users(self, objs):
+        return set(
+            ShoppingCart.objects.filter(
+                recipe_id__in=[obj.pk for obj in objs]
+            ).values_list("user_id", flat=True)
+        )
+
+
+class UserRecipeRelationAdmin(
+    UserVersionAdminMixin, CounterSyncAdminMixin, admin.ModelAdmin
+):
     list_display = ("user", "recipe")
     search_fields = ("user__username", "recipe__name")
     list_filter = ("user", "recipe")
 
+    def counter_targets(self, objs):
+        return {obj.recipe_id for obj in objs}, ()
+
+
+@admin.register(Favorite)
+class FavoriteAdmin(UserRecipeRelationAdmin):
+    pass
+
 
 @admin.register(ShoppingCart)
-class ShoppingCartAdmin(admin.ModelAdmin):
-    list_display = ("user", "recipe")
-    search_fields = ("user__username", "recipe__name")
-    list_filter = ("user", "recipe")
+class ShoppingCartAdmin(ShoppingListSyncAdminMixin, UserRecipeRelationAdmin):
+    def shopping_list_users(self, objs):
+        return {obj.user_id for obj in objs}
+
+
+@admin.register(ShoppingListItem)
+class ShoppingListItemAdmin(admin.ModelAdmin):
+    list_display = ("user", "ingredient", "total_amount")
+    search_fields = ("user__username", "ingredient__name")
+    list_select_related = ("user", "ingredient")
+
+
+@admin.register(ShortLink)
+class ShortLinkAdmin(admin.ModelAdmin):
+    list_display = ("code", "recipe", "hits", "created_at")
+    search_fields = ("code", "recipe__name")
+    list_select_related = ("recipe",)
+    readonly_fields = ("hits",)
@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+VERSION_KEY = "recipes:cache_version:{scope}"
+GLOBAL_SCOPE = "all"
+
+
+def cache_is_shared():
+    """Whether the default cache is seen by every worker process."""
+    return not isinstance(caches["default"], (LocMemCache, DummyCache))
+
+
+def author_scope(author_id):
+    return f"author:{author_id}"
+
+
+def user_scope(user_id):
+    """Scope of a user's favorites, cart and follows (their recipe flags)."""
+    return f"user:{user_id}"
+
+
+def get_version(scope=GLOBAL_SCOPE):
+    """Current cache version for ``scope``.
+
+    A missing counter (never set, or evicted) restarts from the clock, so it
+    can never fall back to a value that older cached entries were keyed on.
+    A cache that keeps nothing, like the dummy one, gets the clock every time.
+    """
+    key = VERSION_KEY.format(scope=scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns() // 1000, timeout=None)
+        version = cache.get(key)
+    if version is None:
+        version = time.time_ns() // 1000
+    return version
+
+
+def bump_version(scope):
+    """Move ``scope`` to a new version, taken from the clock.
+
+    Not ``incr``: file-based caches implement it as a read and a write, and
+    two processes bumping at once would both write the same value.
+    """
+    key = VERSION_KEY.format(scope=scope)
+    version = max(time.time_ns() // 1000, (cache.get(key) or 0) + 1)
+    cache.set(key, version, timeout=None)
+
+
+def bump_recipe_versions(author_id):
+    bump_version(GLOBAL_SCOPE)
+    bump_version(author_scope(author_id))
+
+
+def bump_user_version_on_commit(user_id):
+    transaction.on_commit(partial(bump_version, user_scope(user_id)))
+
+
+class UserVersionAdminMixin:
+    """Bumps the version of the users whose relations an admin edit changes.
+
+    For admins of models with a ``user`` foreign key.
+    """
+
+    def _bump_users(self, objs):
+        for user_id in {obj.user_id for obj in objs}:
+            bump_user_version_on_commit(user_id)
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            self._bump_users([type(obj).objects.get(pk=obj.pk)])
+        super().save_model(request, obj, form, change)
+        self._bump_users([obj])
+
+    def delete_model(self, request, obj):
+        self._bump_users([obj])
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        self._bump_users(queryset)
+        super().delete_queryset(request, queryset)
+
+
+class LRUCache:
+    """Small thread-safe per-process LRU map.
+
+    With a ``timeout`` (seconds), entries also expire that long after being
+    set.
+    """
+
+    def __init__(self, maxsize, timeout=None):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            expires, value = self._data[key]
+            if expires is not None and expires <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires = None if self.timeout is None else time.monotonic() + self.timeout
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,99 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from users.models import Follow, User
+
+from .models import Favorite, Recipe, ShoppingCart
+
+
+def adjust(model, pk, **deltas):
+    """Atomically add ``deltas`` to counter columns of one row."""
+    model.objects.filter(pk=pk).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+
+
+def _count(queryset, field):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total"),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+RECIPE_COUNTERS = {
+    "favorites_count": (Favorite.objects.all(), "recipe"),
+    "in_carts_count": (ShoppingCart.objects.all(), "recipe"),
+}
+USER_COUNTERS = {
+    "recipes_count": (Recipe.objects.all(), "author"),
+    "followers_count": (Follow.objects.all(), "author"),
+}
+
+
+def _reconcile(model, counters, pks):
+    queryset = model.objects.all()
+    if pks is not None:
+        queryset = queryset.filter(pk__in=pks)
+    expressions = {
+        field: _count(source, lookup) for field, (source, lookup) in counters.items()
+    }
+    actual = {f"actual_{field}": expr for field, expr in expressions.items()}
+    drifted = queryset.annotate(**actual).exclude(
+        **{field: F(f"actual_{field}") for field in counters}
+    )
+    drifted_pks = list(drifted.values_list("pk", flat=True))
+    if drifted_pks:
+        model.objects.filter(pk__in=drifted_pks).update(**expressions)
+    return len(drifted_pks)
+
+
+def reconcile(recipe_ids=None, user_ids=None):
+    """Recount counters from the relation tables; returns corrected rows.
+
+    ``None`` means every row; an empty collection skips that model.
+    """
+    fixed_recipes = fixed_users = 0
+    if recipe_ids is None or recipe_ids:
+        fixed_recipes = _reconcile(Recipe, RECIPE_COUNTERS, recipe_ids)
+    if user_ids is None or user_ids:
+        fixed_users = _reconcile(User, USER_COUNTERS, user_ids)
+    return fixed_recipes, fixed_users
+
+
+class CounterSyncAdminMixin:
+    """Recounts the counters touched by admin saves and deletes.
+
+    Subclasses return ``(recipe_ids, user_ids)`` from ``counter_targets``.
+    """
+
+    def counter_targets(self, objs):
+        raise NotImplementedError
+
+    def _sync(self, *targets):
+        recipe_ids = set().union(*(recipes for recipes, _ in targets))
+        user_ids = set().union(*(users for _, users in targets))
+        reconcile(recipe_ids=recipe_ids, user_ids=user_ids)
+
+    def save_model(self, request, obj, form, change):
+        before = ((), ())
+        if change:
+            before = self.counter_targets([type(obj).objects.get(pk=obj.pk)])
+        super().save_model(request, obj, form, change)
+        self._sync(before, self.counter_targets([obj]))
+
+    def delete_model(self, request, obj):
+        targets = self.counter_targets([obj])
+        super().delete_model(request, obj)
+        self._sync(targets)
+
+    def delete_queryset(self, request, queryset):
+        targets = self.counter_targets(queryset)
+        super().delete_queryset(request, queryset)
+        self._sync(targets)
@@ -0,0 +1,36 @@
+import os
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# psycopg_pool counter -> name used in our reports.
+POOL_STATS = {
+    "pool_min": "min_size",
+    "pool_max": "max_size",
+    "pool_size": "size",
+    "pool_available": "available",
+    "requests_num": "checkouts",
+    "requests_queued": "waits",
+    "requests_wait_ms": "wait_ms",
+    "requests_errors": "timeouts",
+    "connections_num": "connections_opened",
+    "connections_ms": "connect_ms",
+    "connections_errors": "connection_errors",
+    "connections_lost": "connections_lost",
+    "returns_bad": "returns_bad",
+}
+
+
+def pool_stats(alias=DEFAULT_DB_ALIAS):
+    """Counters of this process's connection pool, or ``None`` without one.
+
+    Counters accumulate from the time the pool was created.
+    """
+    connection = connections[alias]
+    pool = getattr(connection, "pool", None)
+    if pool is None:
+        return None
+    stats = pool.get_stats()
+    return {
+        "pid": os.getpid(),
+        **{name: stats.get(key, 0) for key, name in POOL_STATS.items()},
+    }
@@ -0,0 +1,216 @@
+import io
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from users.models import User
+
+from .cache import bump_recipe_versions
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+Image.MAX_IMAGE_PIXELS = settings.IMAGE_MAX_PIXELS
+
+# (format key, Pillow format, file extension, save options)
+FORMATS = (
+    ("webp", "WEBP", "webp", {"method": 4}),
+    ("jpeg", "JPEG", "jpg", {"optimize": True, "progressive": True}),
+)
+
+# Model -> (image field, field holding its renditions).
+IMAGE_FIELDS = {
+    Recipe: ("image", "image_renditions"),
+    User: ("avatar", "avatar_renditions"),
+}
+
+_executor = None
+
+
+class ImageTooLarge(ValueError):
+    pass
+
+
+def check_dimensions(image):
+    """Reject images whose header declares too many pixels.
+
+    Only the header has been read at this point, so oversized images are
+    refused before any pixel data is decoded.
+    """
+    width, height = image.size
+    if max(width, height) > settings.IMAGE_MAX_DIMENSION:
+        raise ImageTooLarge(
+            f"Image is {width}x{height}, the largest side may be at most "
+            f"{settings.IMAGE_MAX_DIMENSION}px."
+        )
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise ImageTooLarge(
+            f"Image has {width * height} pixels, at most "
+            f"{settings.IMAGE_MAX_PIXELS} are allowed."
+        )
+
+
+def open_image(stream):
+    image = Image.open(stream)
+    check_dimensions(image)
+    return image
+
+
+def render(image, size):
+    rendition = image.copy()
+    rendition.thumbnail((size, size), Image.Resampling.LANCZOS)
+    for key, pil_format, extension, options in FORMATS:
+        buffer = io.BytesIO()
+        rendition.save(buffer, pil_format, quality=settings.IMAGE_QUALITY, **options)
+        yield key, extension, buffer.getvalue()
+
+
+def generate_renditions(name):
+    """Write every rendition of the stored image ``name``.
+
+    Returns ``{"source": name, <rendition>: {<format>: <storage name>}}``.
+    """
+    stem = posixpath.splitext(name)[0]
+    with default_storage.open(name, "rb") as stored:
+        image = open_image(stored)
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "L"):
+            # JPEG has no alpha channel; flatten onto white.
+            background = Image.new("RGB", image.size, "white")
+            background.paste(image, mask=image.convert("RGBA").getchannel("A"))
+            image = background
+        image = image.convert("RGB")
+
+    renditions = {"source": name}
+    try:
+        for label, size in settings.IMAGE_RENDITIONS.items():
+            files = renditions[label] = {}
+            for key, extension, content in render(image, size):
+                files[key] = default_storage.save(
+                    f"{stem}.{label}.{extension}", ContentFile(content)
+                )
+    except BaseException:
+        # Every save took a reference; give back those made so far.
+        delete_renditions(renditions)
+        raise
+    return renditions
+
+
+def rendition_names(renditions):
+    return [
+        name
+        for label, files in renditions.items()
+        if label != "source"
+        for name in files.values()
+    ]
+
+
+def delete_renditions(renditions):
+    for name in rendition_names(renditions):
+        default_storage.delete(name)
+
+
+def get_renditions(instance):
+    field, renditions_field = IMAGE_FIELDS[type(instance)]
+    return getattr(instance, field), getattr(instance, renditions_field)
+
+
+def needs_renditions(instance):
+    image, renditions = get_renditions(instance)
+    return (image.name or None) != renditions.get("source")
+
+
+def build_renditions(model, pk, force=False):
+    """Bring the stored renditions of one row in line with its image."""
+    field, renditions_field = IMAGE_FIELDS[model]
+    row = model.objects.filter(pk=pk).values(field, renditions_field).first()
+    if row is None:
+        return
+    name, previous = row[field] or None, row[renditions_field]
+    if name == previous.get("source") and not force:
+        return
+
+    renditions = {}
+    if name:
+        try:
+            renditions = generate_renditions(name)
+        except (OSError, UnidentifiedImageError, ImageTooLarge, ValueError):
+            logger.exception("Could not build renditions for %s", name)
+            renditions = {"source": name}
+
+    # Only store the result if the image did not change in the meantime.
+    updated = model.objects.filter(pk=pk, **{field: row[field]}).update(
+        **{renditions_field: renditions}
+    )
+    if not updated:
+        delete_renditions(renditions)
+        return
+    delete_renditions(previous)
+
+    # Image URLs are part of the cached recipe representations.
+    if model is Recipe:
+        author_id = (
+            Recipe.objects.filter(pk=pk).values_list("author_id", flat=True).first()
+        )
+    else:
+        author_id = pk
+    bump_recipe_versions(author_id)
+
+
+def _run(model, pk):
+    try:
+        build_renditions(model, pk)
+    except Exception:
+        logger.exception("Rendition task failed for %s %s", model.__name__, pk)
+    finally:
+        connections.close_all()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_WORKERS, thread_name_prefix="renditions"
+        )
+    return _executor
+
+
+def schedule_renditions(instance):
+    """Build renditions for ``instance`` once the current transaction commits.
+
+    With ``IMAGE_WORKERS = 0`` the work runs inline, otherwise in a
+    per-process thread pool so the request does not wait for it.
+    """
+    model, pk = type(instance), instance.pk
+    if settings.IMAGE_WORKERS:
+        transaction.on_commit(lambda: get_executor().submit(_run, model, pk))
+    else:
+        transaction.on_commit(partial(build_renditions, model, pk), robust=True)
+
+
+def rendition_url(instance, label, file_format="jpeg"):
+    """URL of a rendition, falling back to the original while it is built."""
+    image, renditions = get_renditions(instance)
+    if not image:
+        return ""
+    name = renditions.get(label, {}).get(file_format)
+    if name and renditions.get("source") == image.name:
+        return default_storage.url(name)
+    return image.url
+
+
+def rendition_urls(instance):
+    return {
+        label: {
+            file_format: rendition_url(instance, label, file_format)
+            for file_format, *_ in FORMATS
+        }
+        for label in settings.IMAGE_RENDITIONS
+    }
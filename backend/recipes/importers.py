@@ -0,0 +1,141 @@
+import csv
+import json
+import re
+import time
+from dataclasses import dataclass
+from itertools import islice
+
+from django.db import transaction
+
+from .models import Ingredient
+
+DEFAULT_BATCH_SIZE = 1000
+JSON_CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r"\s*")
+
+
+@dataclass
+class ImportStats:
+    read: int = 0
+    added: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.read / self.seconds if self.seconds else 0.0
+
+
+def read_csv(stream):
+    for row in csv.reader(stream):
+        if len(row) >= 2:
+            yield row[0], row[1]
+
+
+def iter_json_array(stream, chunk_size=JSON_CHUNK_SIZE):
+    """Items of the JSON array in ``stream``, decoded as the file is read.
+
+    Only the item being decoded and the rest of the current chunk are held
+    in memory, never the whole document.
+    """
+    buffer, position = "", 0
+
+    def fill():
+        nonlocal buffer
+        chunk = stream.read(chunk_size)
+        buffer += chunk
+        return bool(chunk)
+
+    def peek():
+        nonlocal position
+        while True:
+            position = _whitespace.match(buffer, position).end()
+            if position < len(buffer):
+                return buffer[position]
+            if not fill():
+                return ""
+
+    def expect(chars):
+        nonlocal position
+        char = peek()
+        if not char or char not in chars:
+            raise json.JSONDecodeError(f"Expecting {chars!r}", buffer, position)
+        position += 1
+        return char
+
+    def decode():
+        nonlocal buffer, position
+        peek()
+        if position >= chunk_size:
+            buffer, position = buffer[position:], 0
+        while True:
+            try:
+                item, end = _decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if fill():
+                    continue
+                raise
+            # Numbers can be cut short by the end of a chunk ("-7." or "1e"),
+            # so the item only counts once the delimiter after it is read.
+            following = _whitespace.match(buffer, end).end()
+            if (following == len(buffer) or buffer[following] not in ",]") and fill():
+                continue
+            position = end
+            return item
+
+    expect("[")
+    if peek() == "]":
+        position += 1
+    else:
+        while True:
+            yield decode()
+            if expect(",]") == "]":
+                break
+    if peek():
+        raise json.JSONDecodeError("Extra data", buffer, position)
+
+
+def read_json(stream):
+    for item in iter_json_array(stream):
+        yield item.get("name", ""), item.get("measurement_unit", "")
+
+
+READERS = {
+    "csv": read_csv,
+    "json": read_json,
+}
+
+
+def unique_ingredients(rows, stats):
+    seen = set()
+    for name, unit in rows:
+        stats.read += 1
+        key = (name.strip(), unit.strip())
+        if not key[0] or not key[1] or key in seen:
+            continue
+        seen.add(key)
+        yield Ingredient(name=key[0], measurement_unit=key[1])
+
+
+def import_ingredients(rows, batch_size=DEFAULT_BATCH_SIZE):
+    """Insert ``(name, measurement_unit)`` pairs that are not stored yet.
+
+    Rows are de-duplicated in memory and written with batched
+    ``bulk_create(ignore_conflicts=True)``, so re-running an import is a
+    no-op apart from the reads.
+    """
+    stats = ImportStats()
+    started = time.perf_counter()
+    ingredients = unique_ingredients(rows, stats)
+    with transaction.atomic():
+        before = Ingredient.objects.count()
+        while batch := list(islice(ingredients, batch_size)):
+            Ingredient.objects.bulk_create(
+                batch, batch_size=batch_size, ignore_conflicts=True
+            )
+        stats.added = Ingredient.objects.count() - before
+    stats.skipped = stats.read - stats.added
+    stats.seconds = time.perf_counter() - started
+    return stats
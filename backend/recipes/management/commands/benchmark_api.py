@@ -0,0 +1,271 @@
+import json
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from recipes.models import Ingredient, Recipe
+from recipes.seed import build_dataset, count_rows
+from rest_framework.authtoken.models import Token
+from users.models import User
+
+# Name -> (authenticated, path builder). Builders get the random generator
+# and the dataset's ids.
+SCENARIOS = {
+    "recipes-list-anonymous": (
+        False,
+        lambda rng, ids: f"/api/recipes/?page={rng.randint(1, 5)}",
+    ),
+    # The same five pages, answered from the response cache once seen.
+    "recipes-list-anonymous-cached": (
+        False,
+        lambda rng, ids: f"/api/recipes/?page={rng.randint(1, 5)}",
+    ),
+    "recipes-list": (True, lambda rng, ids: f"/api/recipes/?page={rng.randint(1, 5)}"),
+    "recipes-list-favorited": (True, lambda rng, ids: "/api/recipes/?is_favorited=1"),
+    "recipes-list-author": (
+        True,
+        lambda rng, ids: f"/api/recipes/?author={rng.choice(ids['users'])}",
+    ),
+    "recipe-detail": (
+        True,
+        lambda rng, ids: f"/api/recipes/{rng.choice(ids['recipes'])}/",
+    ),
+    "ingredients-search": (
+        False,
+        lambda rng, ids: f"/api/ingredients/?name={rng.choice(ids['prefixes'])}",
+    ),
+    "subscriptions": (
+        True,
+        lambda rng, ids: "/api/users/subscriptions/?recipes_limit=3",
+    ),
+    "users-list": (True, lambda rng, ids: "/api/users/"),
+    "users-me": (True, lambda rng, ids: "/api/users/me/"),
+    "download-shopping-cart": (
+        True,
+        lambda rng, ids: "/api/recipes/download_shopping_cart/",
+    ),
+}
+# Run without the anonymous response cache, so that every request builds
+# its response.
+UNCACHED_SCENARIOS = {"recipes-list-anonymous"}
+NO_CACHE = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a fresh test database with a deterministic dataset, time the "
+        "main API endpoints in-process and write the results as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=int, default=1)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--iterations", type=int, default=50, help="Timed requests per endpoint."
+        )
+        parser.add_argument(
+            "--warmup", type=int, default=5, help="Untimed requests per endpoint."
+        )
+        parser.add_argument(
+            "--allocation-iterations",
+            type=int,
+            default=5,
+            help="Requests per endpoint traced for allocations, separately "
+            "from the timed ones.",
+        )
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=sorted(SCENARIOS),
+            help="Only run this endpoint (can be repeated).",
+        )
+        parser.add_argument(
+            "--ingredients",
+            help="Ingredients data file (default: INGREDIENTS_DATA_FILE).",
+        )
+        parser.add_argument("--output", help="Write the results to this JSON file.")
+        parser.add_argument(
+            "--compare", help="Print the change against an earlier results file."
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Reuse the test database of an earlier run instead of "
+            "seeding a new one.",
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options["keepdb"]
+        )
+        try:
+            # A private cache, and no timing logs in the measurements.
+            with override_settings(
+                CACHES={
+                    "default": {
+                        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                        "LOCATION": "benchmark",
+                    }
+                },
+                SERVER_TIMING_LOG_SAMPLE_RATE=0,
+                SLOW_REQUEST_THRESHOLD=float("inf"),
+            ):
+                results = self.benchmark(options)
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options["keepdb"]
+            )
+            teardown_test_environment()
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(results, output, indent=2)
+        if options["compare"]:
+            with open(options["compare"]) as previous:
+                self.compare(json.load(previous), results)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Benchmarked {len(results['endpoints'])} endpoints"
+                + (f", results in {options['output']}" if options["output"] else "")
+            )
+        )
+
+    def benchmark(self, options):
+        started = time.perf_counter()
+        if options["keepdb"] and User.objects.filter(username="bench0").exists():
+            dataset = count_rows()
+        else:
+            dataset = build_dataset(
+                options["scale"], options["seed"], options["ingredients"]
+            )
+        self.stdout.write(f"dataset: {dataset} ({time.perf_counter() - started:.1f}s)")
+
+        ids = {
+            "users": list(
+                User.objects.filter(username__startswith="bench")
+                .order_by("pk")
+                .values_list("pk", flat=True)
+            ),
+            "recipes": list(Recipe.objects.order_by("pk").values_list("pk", flat=True)),
+            "prefixes": sorted(
+                {name[:2] for name in Ingredient.objects.values_list("name", flat=True)}
+            )[:50],
+        }
+        if not ids["recipes"]:
+            raise CommandError("The dataset has no recipes.")
+        token = Token.objects.get(user__username="bench0")
+        clients = {
+            False: Client(),
+            True: Client(headers={"Authorization": f"Token {token.key}"}),
+        }
+
+        endpoints = {}
+        for name in options["scenario"] or SCENARIOS:
+            authenticated, build_path = SCENARIOS[name]
+            client = clients[authenticated]
+            rng = random.Random(f"{options['seed']}:{name}")
+            paths = [build_path(rng, ids) for _ in range(options["iterations"])]
+            if name in UNCACHED_SCENARIOS:
+                with override_settings(CACHES=NO_CACHE):
+                    endpoints[name] = self.run_scenario(client, paths, options)
+            else:
+                endpoints[name] = self.run_scenario(client, paths, options)
+            line = endpoints[name]
+            self.stdout.write(
+                f"{name:>29}: p50 {line['p50_ms']:7.2f} ms, "
+                f"p95 {line['p95_ms']:7.2f} ms, p99 {line['p99_ms']:7.2f} ms, "
+                f"{line['queries']:5.1f} queries, {line['allocated_kb']:8.1f} KiB"
+            )
+
+        return {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "database": connection.vendor,
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "scale": options["scale"],
+                "seed": options["seed"],
+                "iterations": options["iterations"],
+            },
+            "dataset": dataset,
+            "endpoints": endpoints,
+        }
+
+    def run_scenario(self, client, paths, options):
+        for path in paths[: options["warmup"]]:
+            self.get(client, path)
+
+        latencies = []
+        queries = []
+        for path in paths:
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                self.get(client, path)
+                latencies.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured))
+
+        # Traced separately: tracemalloc slows everything down.
+        allocated = []
+        tracemalloc.start()
+        try:
+            for path in paths[: options["allocation_iterations"]]:
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                self.get(client, path)
+                allocated.append(tracemalloc.get_traced_memory()[1] - before)
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "requests": len(latencies),
+            "p50_ms": round(percentile(latencies, 0.50), 3),
+            "p95_ms": round(percentile(latencies, 0.95), 3),
+            "p99_ms": round(percentile(latencies, 0.99), 3),
+            "mean_ms": round(statistics.mean(latencies), 3),
+            "queries": round(statistics.mean(queries), 2),
+            "allocated_kb": round(
+                statistics.mean(allocated) / 1024 if allocated else 0, 1
+            ),
+        }
+
+    @staticmethod
+    def get(client, path):
+        response = client.get(path)
+        if response.status_code != 200:
+            raise CommandError(f"GET {path} answered {response.status_code}")
+        if getattr(response, "streaming", False):
+            b"".join(response.streaming_content)
+        return response
+
+    def compare(self, previous, current):
+        self.stdout.write("change against the earlier run (p50, p95, queries):")
+        for name, line in current["endpoints"].items():
+            before = previous["endpoints"].get(name)
+            if before is None:
+                continue
+            changes = [
+                f"{key} {line[key] - before[key]:+.2f} "
+                f"({(line[key] / before[key] - 1) * 100 if before[key] else 0:+.0f}%)"
+                for key in ("p50_ms", "p95_ms", "queries")
+            ]
+            self.stdout.write(f"{name:>24}: " + ", ".join(changes))
@@ -0,0 +1,150 @@
+import statistics
+import threading
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from recipes import tokens
+from recipes.db import pool_stats
+from rest_framework.authtoken.models import Token
+from users.models import User
+
+from .benchmark_reads import wsgi_get
+
+# Mode -> overrides of the default database settings.
+MODES = {
+    "fresh": {"CONN_MAX_AGE": 0},
+    "persistent": {"CONN_MAX_AGE": 600, "CONN_HEALTH_CHECKS": True},
+    "pool": {"CONN_MAX_AGE": 0, "pool": True},
+}
+
+
+def configure(mode, threads):
+    """Point new connections of ``default`` at the settings of ``mode``."""
+    connections["default"].close_pool()
+    overrides = dict(MODES[mode])
+    settings_dict = connections.settings["default"]
+    options = settings_dict["OPTIONS"]
+    options.pop("pool", None)
+    if overrides.pop("pool", False):
+        options["pool"] = {"min_size": threads, "max_size": threads}
+    settings_dict.update(overrides)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the per-request latency of a cheap authenticated endpoint "
+        "with fresh, persistent and pooled database connections"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/api/ingredients/?name=a")
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=1,
+            help="Concurrent requests, like gthread worker threads.",
+        )
+        parser.add_argument(
+            "--user",
+            help="Authenticate with this user's token (default: the first "
+            "active user). The token lookup is the request's only query: "
+            "the token cache is bypassed for the run.",
+        )
+        parser.add_argument(
+            "--modes", nargs="+", choices=sorted(MODES), default=list(MODES)
+        )
+
+    def handle(self, *args, **options):
+        if connections["default"].vendor != "postgresql":
+            raise CommandError("The benchmark needs a PostgreSQL database.")
+        users = User.objects.filter(is_active=True).order_by("pk")
+        if options["user"]:
+            users = users.filter(username=options["user"])
+        user = users.first()
+        if user is None:
+            raise CommandError("No matching active user.")
+        token, _ = Token.objects.get_or_create(user=user)
+        headers = [
+            ("Accept", "application/json"),
+            ("Authorization", f"Token {token.key}"),
+        ]
+        with tokens.bypassed():
+            self.benchmark(options, headers)
+        self.stdout.write(self.style.SUCCESS("Done"))
+
+    def benchmark(self, options, headers):
+        # Warm up imports and the ingredient index outside the measurements.
+        handler = WSGIHandler()
+        wsgi_get(handler, options["path"], headers)
+        with CaptureQueriesContext(connections["default"]) as queries:
+            wsgi_get(handler, options["path"], headers)
+        connections.close_all()
+        if len(queries) != 1:
+            raise CommandError(
+                f"{options['path']} ran {len(queries)} queries instead of one; "
+                "the benchmark measures requests that reach the database once."
+            )
+
+        original = {
+            key: value
+            for key, value in connections.settings["default"].items()
+            if key != "OPTIONS"
+        }
+        original_options = dict(connections.settings["default"]["OPTIONS"])
+        baseline = None
+        try:
+            for mode in options["modes"]:
+                configure(mode, options["threads"])
+                latencies = self.run(options["path"], headers, options)
+                mean = statistics.mean(latencies)
+                baseline = baseline or mean
+                self.stdout.write(
+                    f"{mode:>10}: mean {mean:6.2f} ms, "
+                    f"p50 {statistics.median(latencies):6.2f} ms, "
+                    f"p95 {latencies[int(len(latencies) * 0.95) - 1]:6.2f} ms, "
+                    f"saved {baseline - mean:+6.2f} ms/request"
+                )
+                stats = pool_stats()
+                if stats:
+                    self.stdout.write(
+                        f"{'':>10}  pool: {stats['checkouts']} checkouts, "
+                        f"{stats['waits']} waits ({stats['wait_ms']} ms), "
+                        f"{stats['timeouts']} timeouts, "
+                        f"{stats['connections_opened']} connections opened"
+                    )
+        finally:
+            connections["default"].close_pool()
+            connections.settings["default"].update(original)
+            connections.settings["default"]["OPTIONS"] = original_options
+
+    def run(self, path, headers, options):
+        handler = WSGIHandler()
+        latencies = []
+        failures = []
+        lock = threading.Lock()
+        per_thread = max(1, options["requests"] // options["threads"])
+
+        def work():
+            # Each thread gets its own connection, built from the settings
+            # of the current mode.
+            try:
+                for _ in range(per_thread):
+                    status, latency = wsgi_get(handler, path, headers)
+                    with lock:
+                        latencies.append(latency * 1000)
+                        if status != 200:
+                            failures.append(status)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=work) for _ in range(options["threads"])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if failures:
+            raise CommandError(f"{path} answered {sorted(set(failures))}")
+        return sorted(latencies)
@@ -0,0 +1,206 @@
+import asyncio
+import io
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+
+
+def host():
+    """A host name the site accepts."""
+    for name in settings.ALLOWED_HOSTS:
+        if name != "*":
+            return name.lstrip(".")
+    return "localhost"
+
+
+class SlowQueries:
+    """Execute wrapper that adds a fixed delay to every query."""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def __call__(self, execute, sql, params, many, context):
+        time.sleep(self.delay)
+        return execute(sql, params, many, context)
+
+    def install(self, connection, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+
+def wsgi_get(handler, path, headers):
+    url = urlsplit(path)
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": url.path,
+        "QUERY_STRING": url.query,
+        "SERVER_NAME": host(),
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "wsgi.input": io.BytesIO(),
+        "wsgi.url_scheme": "http",
+        **{f"HTTP_{name.upper().replace('-', '_')}": value for name, value in headers},
+    }
+    status = []
+    started = time.perf_counter()
+    response = handler(environ, lambda code, *args: status.append(code))
+    b"".join(response)
+    response.close()
+    return int(status[0].split()[0]), time.perf_counter() - started
+
+
+async def asgi_get(handler, path, headers):
+    url = urlsplit(path)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": url.path,
+        "raw_path": url.path.encode(),
+        "query_string": url.query.encode(),
+        "root_path": "",
+        "headers": [(b"host", host().encode())]
+        + [(name.lower().encode(), value.encode()) for name, value in headers],
+        "client": ("127.0.0.1", 0),
+        "server": (host(), 80),
+    }
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+    status = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # The client never disconnects; the handler cancels this wait.
+        await asyncio.Future()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    started = time.perf_counter()
+    await handler(scope, receive, send)
+    return status[0], time.perf_counter() - started
+
+
+def run_sync(path, headers, requests, concurrency):
+    handler = WSGIHandler()
+
+    def call(_):
+        try:
+            return wsgi_get(handler, path, headers)
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        started = time.perf_counter()
+        results = list(executor.map(call, range(requests)))
+    return results, time.perf_counter() - started
+
+
+def run_async(path, headers, requests, concurrency):
+    handler = ASGIHandler()
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def call():
+            async with semaphore:
+                return await asgi_get(handler, path, headers)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(call() for _ in range(requests)))
+        return results, time.perf_counter() - started
+
+    return asyncio.run(main())
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the throughput of the sync (WSGI) and async (ASGI) read views "
+        "while every database query is artificially slowed down"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/api/recipes/")
+        parser.add_argument("--requests", type=int, default=100)
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=20,
+            help="Requests in flight at once on the async server.",
+        )
+        parser.add_argument(
+            "--sync-workers",
+            type=int,
+            default=1,
+            help="Requests in flight at once on the sync server, like gunicorn "
+            "sync workers.",
+        )
+        parser.add_argument(
+            "--delay",
+            type=float,
+            default=20,
+            help="Milliseconds added to every query.",
+        )
+        parser.add_argument(
+            "--user",
+            help="Authenticate as this user's token instead of anonymously, "
+            "which bypasses the anonymous response cache.",
+        )
+
+    def handle(self, *args, **options):
+        headers = [("Accept", "application/json")]
+        if options["user"]:
+            token = Token.objects.filter(user__username=options["user"]).first()
+            if token is None:
+                raise CommandError(f"User {options['user']} has no token.")
+            headers.append(("Authorization", f"Token {token.key}"))
+
+        slow = SlowQueries(options["delay"] / 1000)
+        connection_created.connect(slow.install)
+        for connection in connections.all():
+            slow.install(connection)
+        try:
+            runs = (
+                ("sync", "foodgram.urls", run_sync, options["sync_workers"]),
+                ("async", "foodgram.async_urls", run_async, options["concurrency"]),
+            )
+            throughput = {}
+            for label, urlconf, run, concurrency in runs:
+                with override_settings(ROOT_URLCONF=urlconf):
+                    results, elapsed = run(
+                        options["path"], headers, options["requests"], concurrency
+                    )
+                throughput[label] = self.report(label, results, elapsed)
+        finally:
+            connection_created.disconnect(slow.install)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"async/sync throughput: {throughput['async'] / throughput['sync']:.1f}x"
+            )
+        )
+
+    def report(self, label, results, elapsed):
+        statuses = sorted({status for status, _ in results})
+        latencies = sorted(latency * 1000 for _, latency in results)
+        throughput = len(results) / elapsed
+        self.stdout.write(
+            f"{label:>5}: {throughput:8.1f} req/s, "
+            f"p50 {statistics.median(latencies):7.1f} ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95) - 1]:7.1f} ms, "
+            f"status {statuses}"
+        )
+        return throughput
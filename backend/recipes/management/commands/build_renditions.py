@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from recipes.images import IMAGE_FIELDS, build_renditions, needs_renditions
+
+
+class Command(BaseCommand):
+    help = "Build missing or outdated image renditions for recipes and avatars"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Rebuild renditions even when they look up to date.",
+        )
+
+    def handle(self, *args, **options):
+        for model, (field, renditions_field) in IMAGE_FIELDS.items():
+            rows = model.objects.exclude(**{field: ""}).exclude(**{field: None})
+            built = 0
+            for instance in rows.only("pk", field, renditions_field).iterator():
+                if options["force"] or needs_renditions(instance):
+                    build_renditions(model, instance.pk, force=options["force"])
+                    built += 1
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{model._meta.verbose_name_plural}: {built} renditions built"
+                )
+            )
@@ -0,0 +1,92 @@
+import os
+import time
+from collections import Counter
+
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipes.images import IMAGE_FIELDS, rendition_names
+from recipes.models import MediaFile
+
+
+def referenced_files():
+    refs = Counter()
+    for model, (field, renditions_field) in IMAGE_FIELDS.items():
+        rows = model.objects.values_list(field, renditions_field)
+        for name, renditions in rows.iterator():
+            if name:
+                refs[name] += 1
+            refs.update(rendition_names(renditions))
+    return refs
+
+
+def stored_files(directory):
+    directories, files = default_storage.listdir(directory)
+    for name in files:
+        yield f"{directory}/{name}"
+    for subdirectory in directories:
+        yield from stored_files(f"{directory}/{subdirectory}")
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount media file references from recipes and avatars and delete "
+        "files nothing refers to"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace",
+            type=int,
+            default=60,
+            help="Keep unreferenced files younger than this many minutes.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report what would be changed.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        with transaction.atomic():
+            refs = referenced_files()
+            stored = dict(
+                MediaFile.objects.select_for_update().values_list("name", "refs")
+            )
+            drifted = {
+                name: count for name, count in refs.items() if stored.get(name) != count
+            }
+            if not dry_run:
+                for name, count in drifted.items():
+                    MediaFile.objects.update_or_create(
+                        name=name, defaults={"refs": count}
+                    )
+                MediaFile.objects.filter(name__in=set(stored) - set(refs)).delete()
+
+        orphans = []
+        if isinstance(default_storage, FileSystemStorage):
+            cutoff = time.time() - options["grace"] * 60
+            directories = {
+                model._meta.get_field(field).upload_to.rstrip("/")
+                for model, (field, _) in IMAGE_FIELDS.items()
+            }
+            for directory in sorted(directories):
+                if not default_storage.exists(directory):
+                    continue
+                for name in stored_files(directory):
+                    if name in refs:
+                        continue
+                    if os.path.getmtime(default_storage.path(name)) > cutoff:
+                        continue
+                    orphans.append(name)
+                    if not dry_run:
+                        default_storage.delete(name)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(refs)} files referenced, {len(drifted)} reference counts "
+                f"corrected, {len(orphans)} orphaned files "
+                f"{'found' if dry_run else 'deleted'}"
+            )
+        )
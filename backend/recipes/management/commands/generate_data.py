@@ -0,0 +1,133 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from recipes import counters, shopping_list
+from recipes.models import Ingredient, Recipe
+from recipes.search import update_search_vectors
+from recipes.seed import load_ingredients
+from recipes.synthetic import PASSWORD, generate
+from users.models import User
+
+SEARCH_BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a large synthetic dataset with skewed (Zipf) follows, "
+        "favorites, carts and ingredient usage for load tests, reporting "
+        "rows per second"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--recipes", type=int, default=50000)
+        parser.add_argument("--follows", type=int, default=200000)
+        parser.add_argument("--favorites", type=int, default=500000)
+        parser.add_argument("--carts", type=int, default=100000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--skew",
+            type=float,
+            default=1.1,
+            help="Zipf exponent: higher concentrates more activity on the "
+            "first users, authors, recipes and ingredients.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Processes generating and writing chunks (PostgreSQL only).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Users (or recipes) per chunk; each chunk is one transaction.",
+        )
+        parser.add_argument(
+            "--prefix",
+            default="load",
+            help="Username prefix of the generated users.",
+        )
+        parser.add_argument(
+            "--ingredients",
+            help="Ingredients data file, loaded if there are no ingredients "
+            "(default: INGREDIENTS_DATA_FILE).",
+        )
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(
+                f"Users named {prefix}* already exist; choose another --prefix."
+            )
+        workers = options["workers"]
+        if connection.vendor != "postgresql" and workers > 1:
+            self.stdout.write("Only PostgreSQL takes parallel writes, using 1 worker")
+            workers = 1
+        if not Ingredient.objects.exists():
+            load_ingredients(options["ingredients"])
+
+        started = time.perf_counter()
+        total = 0
+
+        def report(table, rows, seconds):
+            nonlocal total
+            total += rows
+            self.stdout.write(
+                f"{table:>20}: {rows:>10} rows in {seconds:7.1f}s "
+                f"({rows / seconds if seconds else 0:,.0f} rows/s)"
+            )
+
+        generate(
+            options["users"],
+            options["recipes"],
+            options["follows"],
+            options["favorites"],
+            options["carts"],
+            seed=options["seed"],
+            workers=workers,
+            chunk_size=options["chunk_size"],
+            prefix=prefix,
+            skew=options["skew"],
+            report=report,
+        )
+        written = time.perf_counter() - started
+
+        user_ids = User.objects.filter(username__startswith=prefix).values("pk")
+        # Rows were written without the signals that keep these up to date.
+        self.step("counters", counters.reconcile)
+        self.step("shopping lists", shopping_list.rebuild, user_ids)
+        self.step("search vectors", self.update_search_vectors, user_ids)
+        if connection.vendor == "postgresql":
+            self.step("analyze", self.analyze)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {total} rows in {written:.1f}s "
+                f"({total / written if written else 0:,.0f} rows/s), "
+                f"{time.perf_counter() - started:.1f}s in all; "
+                f"users {prefix}0.. log in with password {PASSWORD!r}"
+            )
+        )
+
+    def step(self, name, function, *args):
+        started = time.perf_counter()
+        function(*args)
+        self.stdout.write(f"{name:>20}: {time.perf_counter() - started:7.1f}s")
+
+    @staticmethod
+    def update_search_vectors(user_ids):
+        recipe_ids = list(
+            Recipe.objects.filter(author_id__in=user_ids)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        for start in range(0, len(recipe_ids), SEARCH_BATCH_SIZE):
+            update_search_vectors(recipe_ids[start : start + SEARCH_BATCH_SIZE])
+
+    @staticmethod
+    def analyze():
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
@@ -1,45 +1,60 @@
-import csv
-import os
+import sys
 from pathlib import Path
 from django.conf import settings
-from django.core.management.base import BaseCommand
-from recipes.models import Ingredient
+from django.core.management.base import BaseCommand, CommandError
+from recipes.importers import DEFAULT_BATCH_SIZE, READERS, import_ingredients
+from recipes.search import ingredient_index
 
 
 class Command(BaseCommand):
-    help = "Import ingredients from CSV file"
+    help = "Import ingredients from a CSV or JSON file (use '-' for stdin)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            nargs="?",
+            default=settings.INGREDIENTS_DATA_FILE,
+            help="Path to the data file, or '-' to read from stdin.",
+        )
+        parser.add_argument(
+            "--format",
+            choices=sorted(READERS),
+            help="Input format. Guessed from the file extension by default.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Rows inserted per INSERT statement.",
+        )
 
     def handle(self, *args, **options):
-        file_path = Path("/app/data/ingredients.csv")
-
-        if not file_path.exists():
-            self.stdout.write(self.style.ERROR(f"File not found: {file_path}"))
-            return
-
-        created_count = 0
-        duplicates = 0
-
-        with open(file_path, "r", encoding="utf-8") as csvfile:
-            reader = csv.reader(csvfile)
-            for row in reader:
-                if len(row) < 2:
-                    continue
-
-                name = row[0].strip()
-                unit = row[1].strip()
-
-                _, created = Ingredient.objects.get_or_create(
-                    name=name, measurement_unit=unit
+        path = options["path"]
+        file_format = options["format"]
+
+        if path == "-":
+            reader = READERS[file_format or "csv"]
+            stats = import_ingredients(reader(sys.stdin), options["batch_size"])
+        else:
+            file_path = Path(path)
+            if not file_path.exists():
+                self.stdout.write(self.style.ERROR(f"File not found: {file_path}"))
+                return
+            file_format = file_format or file_path.suffix.lstrip(".").lower()
+            if file_format not in READERS:
+                raise CommandError(f"Unsupported format: {file_format}")
+            with open(file_path, "r", encoding="utf-8") as data_file:
+                stats = import_ingredients(
+                    READERS[file_format](data_file), options["batch_size"]
                 )
 
-                if created:
-                    created_count += 1
-                else:
-                    duplicates += 1
+        ingredient_index.invalidate()
 
         self.stdout.write(
             self.style.SUCCESS(
                 f"Successfully imported ingredients: "
-                f"{created_count} added, {duplicates} duplicates skipped"
+                f"{stats.added} added, {stats.skipped} duplicates skipped "
+                f"({stats.read} rows in {stats.seconds:.2f}s, "
+                f"{stats.rows_per_second:.0f} rows/s)"
             )
         )
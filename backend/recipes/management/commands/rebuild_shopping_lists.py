@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from recipes.shopping_list import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the stored per-user shopping lists from the shopping carts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="user_ids",
+            help="Only rebuild the list of this user id (can be repeated).",
+        )
+
+    def handle(self, *args, **options):
+        created = rebuild(options["user_ids"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt shopping lists: {created} items stored")
+        )
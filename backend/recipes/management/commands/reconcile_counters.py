@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from recipes.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = "Recount the denormalized recipe and user counters"
+
+    def handle(self, *args, **options):
+        recipes, users = reconcile()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Counters reconciled: {recipes} recipes and {users} users corrected"
+            )
+        )
@@ -0,0 +1,126 @@
+import hashlib
+import os
+import sys
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.finders import get_finders
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+from recipes.models import StartupChecksum
+
+LOCK_KEY = zlib.crc32(b"foodgram:startup")
+# The collected files live outside the database, so their checksum is kept
+# next to them: a fresh static volume is filled again.
+STATIC_MARKER = ".startup-checksum"
+
+
+def migrations_checksum():
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    digest = hashlib.sha256()
+    for key, migration in sorted(loader.disk_migrations.items()):
+        digest.update(repr(key).encode())
+        digest.update(Path(sys.modules[migration.__module__].__file__).read_bytes())
+    return digest.hexdigest()
+
+
+def ingredients_checksum():
+    path = Path(settings.INGREDIENTS_DATA_FILE)
+    if not path.exists():
+        return None
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def static_checksum():
+    digest = hashlib.sha256()
+    for finder in get_finders():
+        for path, storage in sorted(finder.list([]), key=lambda item: item[0]):
+            stat = os.stat(storage.path(path))
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def stored_checksum(step):
+    if step == "collectstatic":
+        marker = Path(settings.STATIC_ROOT) / STATIC_MARKER
+        return marker.read_text() if marker.exists() else None
+    if StartupChecksum._meta.db_table not in connection.introspection.table_names():
+        return None
+    return (
+        StartupChecksum.objects.filter(step=step)
+        .values_list("checksum", flat=True)
+        .first()
+    )
+
+
+def store_checksum(step, checksum):
+    if step == "collectstatic":
+        (Path(settings.STATIC_ROOT) / STATIC_MARKER).write_text(checksum)
+    else:
+        StartupChecksum.objects.update_or_create(
+            step=step, defaults={"checksum": checksum}
+        )
+
+
+@contextmanager
+def startup_lock():
+    """Let only one replica run the steps; the others wait and then skip."""
+    if connection.vendor != "postgresql":
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_lock(%s)", [LOCK_KEY])
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [LOCK_KEY])
+
+
+class Command(BaseCommand):
+    help = (
+        "Migrate, import ingredients and collect static files, skipping each "
+        "step whose inputs did not change since it last ran"
+    )
+
+    steps = (
+        ("migrate", migrations_checksum, {"interactive": False}),
+        ("import_ingridients", ingredients_checksum, {}),
+        ("collectstatic", static_checksum, {"interactive": False}),
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Run every step regardless of the stored checksums.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with startup_lock():
+            self.stdout.write(f"lock: {time.perf_counter() - started:.2f}s")
+            for step, checksum_of, step_options in self.steps:
+                step_started = time.perf_counter()
+                checksum = checksum_of()
+                if checksum is None:
+                    outcome = "no input, skipped"
+                elif not options["force"] and checksum == stored_checksum(step):
+                    outcome = "unchanged, skipped"
+                else:
+                    call_command(step, verbosity=options["verbosity"], **step_options)
+                    store_checksum(step, checksum)
+                    outcome = "done"
+                self.stdout.write(
+                    f"{step}: {outcome} ({time.perf_counter() - step_started:.2f}s)"
+                )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Startup finished in {time.perf_counter() - started:.2f}s"
+            )
+        )
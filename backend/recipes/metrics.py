@@ -0,0 +1,126 @@
+"""Prometheus metrics, served at ``/metrics``.
+
+Under gunicorn every worker writes its samples to memory-mapped files in
+``PROMETHEUS_MULTIPROC_DIR`` (set up by ``gunicorn.conf.py``) and the
+endpoint merges the files of all workers. Without that variable the
+metrics of the serving process alone are reported.
+"""
+
+import os
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from .timing import current_timings
+
+REQUEST_LATENCY = Histogram(
+    "foodgram_request_duration_seconds",
+    "Time spent handling a request, by view action.",
+    ["view"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS = Counter(
+    "foodgram_requests",
+    "Requests handled, by view action and status code.",
+    ["view", "status"],
+)
+REQUEST_QUERIES = Histogram(
+    "foodgram_request_db_queries",
+    "Database queries run per request, by view action.",
+    ["view"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+IN_FLIGHT = Gauge(
+    "foodgram_requests_in_flight",
+    "Requests being handled right now.",
+    multiprocess_mode="livesum",
+)
+CACHE_LOOKUPS = Counter(
+    "foodgram_cache_lookups",
+    "Cache lookups, by cache and result (hit or miss).",
+    ["cache", "result"],
+)
+
+
+def view_label(request):
+    """``RecipeViewSet.list`` for viewset actions, the function name otherwise."""
+    match = request.resolver_match
+    if match is None:
+        return "unmatched"
+    view = match.func
+    cls = getattr(view, "cls", None)
+    if cls is None:
+        return view.__name__
+    method = request.method.lower()
+    action = (getattr(view, "actions", None) or {}).get(method, method)
+    return f"{cls.__name__}.{action}"
+
+
+def record_cache(cache_name, hit):
+    CACHE_LOOKUPS.labels(cache_name, "hit" if hit else "miss").inc()
+
+
+class MetricsMiddleware:
+    """Request latency, query count and in-flight metrics.
+
+    Goes right after ``ServerTimingMiddleware``, whose query count it reports.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        IN_FLIGHT.inc()
+        try:
+            response = self.get_response(request)
+        finally:
+            IN_FLIGHT.dec()
+        self.observe(request, response, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        IN_FLIGHT.inc()
+        try:
+            response = await self.get_response(request)
+        finally:
+            IN_FLIGHT.dec()
+        self.observe(request, response, time.perf_counter() - started)
+        return response
+
+    @staticmethod
+    def observe(request, response, duration):
+        view = view_label(request)
+        REQUEST_LATENCY.labels(view).observe(duration)
+        REQUESTS.labels(view, response.status_code).inc()
+        timings = current_timings()
+        if timings is not None:
+            REQUEST_QUERIES.labels(view).observe(timings.queries)
+
+
+def metrics_view(request):
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,52 @@
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_relations(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    counters = {
+        "favorites_count": apps.get_model("recipes", "Favorite"),
+        "in_carts_count": apps.get_model("recipes", "ShoppingCart"),
+    }
+    Recipe.objects.update(
+        **{
+            field: Coalesce(
+                Subquery(
+                    model.objects.filter(recipe=OuterRef("pk"))
+                    .order_by()
+                    .values("recipe")
+                    .annotate(total=Count("pk"))
+                    .values("total"),
+                    output_field=IntegerField(),
+                ),
+                Value(0),
+            )
+            for field, model in counters.items()
+        }
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0002_shoppinglistitem"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="favorites_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Favorites Count"
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="in_carts_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="In Shopping Carts"
+            ),
+        ),
+        migrations.RunPython(count_relations, migrations.RunPython.noop),
+    ]
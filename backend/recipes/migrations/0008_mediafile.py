@@ -0,0 +1,39 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0007_recipe_image_renditions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MediaFile",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        max_length=255, unique=True, verbose_name="File Name"
+                    ),
+                ),
+                (
+                    "refs",
+                    models.PositiveIntegerField(default=0, verbose_name="References"),
+                ),
+            ],
+            options={
+                "verbose_name": "Media File",
+                "verbose_name_plural": "Media Files",
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0009_shortlink"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StartupChecksum",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "step",
+                    models.CharField(max_length=32, unique=True, verbose_name="Step"),
+                ),
+                (
+                    "checksum",
+                    models.CharField(max_length=64, verbose_name="Checksum"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Updated"),
+                ),
+            ],
+            options={
+                "verbose_name": "Startup Checksum",
+                "verbose_name_plural": "Startup Checksums",
+            },
+        ),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0010_startupchecksum"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="recipe",
+            name="updated_at",
+        ),
+    ]
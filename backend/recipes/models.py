@@ -1,7 +1,9 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db.models import Exists, OuterRef, Manager, Value, BooleanField
-from users.models import User
+from django.db.models import Exists, OuterRef, Manager, Prefetch, Value, BooleanField
+from users.models import Follow, User
 from django.conf import settings
 from django.urls import reverse
 
@@ -49,10 +51,26 @@ class RecipeManager(Manager):
                 is_in_shopping_cart=Exists(
                     ShoppingCart.objects.filter(user=user, recipe=OuterRef("pk"))
                 ),
+                author_is_subscribed=Exists(
+                    Follow.objects.filter(user=user, author=OuterRef("author"))
+                ),
             )
         return queryset.annotate(
             is_favorited=Value(False, output_field=BooleanField()),
             is_in_shopping_cart=Value(False, output_field=BooleanField()),
+            author_is_subscribed=Value(False, output_field=BooleanField()),
+        )
+
+    def for_read(self, user):
+        return (
+            self.with_user_annotations(user)
+            .select_related("author")
+            .prefetch_related(
+                Prefetch(
+                    "recipe_ingredients",
+                    queryset=RecipeIngredient.objects.select_related("ingredient"),
+                )
+            )
         )
 
 
@@ -73,6 +91,12 @@ class Recipe(models.Model):
         upload_to="recipes/images/",
         verbose_name="Image",
     )
+    image_renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Image Renditions",
+    )
     cooking_time = models.PositiveSmallIntegerField(
         verbose_name="Cooking Time (minutes)",
         validators=[
@@ -94,11 +118,32 @@ class Recipe(models.Model):
         auto_now_add=True,
         verbose_name="Publication Date",
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Favorites Count",
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="In Shopping Carts",
+    )
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ["-pub_date"]
         verbose_name = "Recipe"
         verbose_name_plural = "Recipes"
+        indexes = [
+            models.Index(fields=["-pub_date", "-id"], name="recipe_feed_idx"),
+            models.Index(
+                fields=["author", "-pub_date", "-id"], name="recipe_author_feed_idx"
+            ),
+            GinIndex(fields=["search_vector"], name="recipe_search_idx"),
+            GinIndex(
+                fields=["name"], opclasses=["gin_trgm_ops"], name="recipe_name_trgm_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -191,3 +236,77 @@ class ShoppingCart(UserRecipeRelation):
 
     def __str__(self):
         return f"ShoppingCart: {self.user.username} <> {self.recipe.name}"
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="shopping_list",
+        verbose_name="User",
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name="shopping_list_items",
+        verbose_name="Ingredient",
+    )
+    total_amount = models.PositiveIntegerField(verbose_name="Total Amount")
+
+    class Meta:
+        verbose_name = "Shopping List Item"
+        verbose_name_plural = "Shopping List Items"
+        ordering = ["ingredient__name"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "ingredient"],
+                name="unique_shopping_list_item",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.ingredient} — {self.total_amount} for {self.user}"
+
+
+class MediaFile(models.Model):
+    name = models.CharField(max_length=255, unique=True, verbose_name="File Name")
+    refs = models.PositiveIntegerField(default=0, verbose_name="References")
+
+    class Meta:
+        verbose_name = "Media File"
+        verbose_name_plural = "Media Files"
+
+    def __str__(self):
+        return f"{self.name} ({self.refs})"
+
+
+class ShortLink(models.Model):
+    code = models.CharField(max_length=16, unique=True, verbose_name="Code")
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="short_link",
+        verbose_name="Recipe",
+    )
+    hits = models.PositiveBigIntegerField(default=0, verbose_name="Hits")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created")
+
+    class Meta:
+        verbose_name = "Short Link"
+        verbose_name_plural = "Short Links"
+
+    def __str__(self):
+        return f"{self.code} -> {self.recipe_id}"
+
+
+class StartupChecksum(models.Model):
+    step = models.CharField(max_length=32, unique=True, verbose_name="Step")
+    checksum = models.CharField(max_length=64, verbose_name="Checksum")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Updated")
+
+    class Meta:
+        verbose_name = "Startup Checksum"
+        verbose_name_plural = "Startup Checksums"
+
+    def __str__(self):
+        return f"{self.step}: {self.checksum}"
@@ -0,0 +1,233 @@
+from django.db import connection, transaction
+from django.db.models import F
+
+from users.models import Follow, User
+
+from . import shopping_list
+from .cache import bump_user_version_on_commit
+from .models import Favorite, Recipe, ShoppingCart
+
+ADDED = "added"
+ALREADY_PRESENT = "already_present"
+REMOVED = "removed"
+NOT_PRESENT = "not_present"
+MISSING = "missing"
+INVALID = "invalid"
+
+RECIPE_COUNTERS = {
+    Favorite: "favorites_count",
+    ShoppingCart: "in_carts_count",
+}
+
+
+def lock_user(user):
+    """Serialize relation changes of one user for the current transaction.
+
+    ``FOR NO KEY UPDATE``, which the foreign key checks of concurrent
+    inserts referencing the user do not wait for.
+    """
+    User.objects.select_for_update(no_key=True).filter(pk=user.pk).exists()
+
+
+def _column(model, name):
+    field = model._meta.get_field(name)
+    return field, connection.ops.quote_name(field.column)
+
+
+def insert_ignore(model, fields, rows, returning):
+    """``INSERT ... ON CONFLICT DO NOTHING RETURNING``.
+
+    ``rows`` are tuples of values for ``fields``. Returns the ``returning``
+    values of the rows this statement added: of concurrent inserts of the
+    same row, only one gets it back.
+    """
+    if not rows:
+        return set()
+    columns = [_column(model, name) for name in fields]
+    placeholders = "({})".format(", ".join(["%s"] * len(columns)))
+    sql = "INSERT INTO {} ({}) VALUES {} ON CONFLICT DO NOTHING RETURNING {}".format(
+        connection.ops.quote_name(model._meta.db_table),
+        ", ".join(column for _, column in columns),
+        ", ".join([placeholders] * len(rows)),
+        _column(model, returning)[1],
+    )
+    params = [
+        field.get_db_prep_value(value, connection)
+        for row in rows
+        for (field, _), value in zip(columns, row)
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return {value for value, in cursor.fetchall()}
+
+
+def delete_returning(model, returning, owner, owner_id, targets=None):
+    """``DELETE ... RETURNING`` of the ``owner_id`` rows pointing to ``targets``.
+
+    ``owner`` and ``returning`` name the two foreign keys; ``targets=None``
+    deletes all of the owner's rows. Returns the targets whose rows this
+    statement deleted, like ``insert_ignore``.
+    """
+    if targets is not None and not targets:
+        return set()
+    owner_field, owner_column = _column(model, owner)
+    target_field, target_column = _column(model, returning)
+    sql = "DELETE FROM {} WHERE {} = %s".format(
+        connection.ops.quote_name(model._meta.db_table), owner_column
+    )
+    params = [owner_field.get_db_prep_value(owner_id, connection)]
+    if targets is not None:
+        sql += " AND {} IN ({})".format(target_column, ", ".join(["%s"] * len(targets)))
+        params += [target_field.get_db_prep_value(pk, connection) for pk in targets]
+    with connection.cursor() as cursor:
+        cursor.execute(f"{sql} RETURNING {target_column}", params)
+        return {value for value, in cursor.fetchall()}
+
+
+def _recipes_changed(model, user, recipe_ids, delta):
+    if not recipe_ids:
+        return
+    bump_user_version_on_commit(user.pk)
+    field = RECIPE_COUNTERS[model]
+    Recipe.objects.filter(pk__in=recipe_ids).update(**{field: F(field) + delta})
+    if model is ShoppingCart:
+        if delta > 0:
+            shopping_list.add_recipes(user.pk, recipe_ids)
+        else:
+            shopping_list.remove_recipes(user.pk, recipe_ids)
+
+
+def _statuses(ids, found, changed, changed_status, unchanged_status):
+    return {
+        pk: (
+            MISSING
+            if pk not in found
+            else changed_status if pk in changed else unchanged_status
+        )
+        for pk in ids
+    }
+
+
+@transaction.atomic
+def add_recipe(model, user, recipe):
+    """Add one recipe to favorites or the cart; False if it was already there.
+
+    The cart also takes the user lock, in the same order as the bulk path,
+    because the shopping list rows are shared by all of the user's recipes.
+    """
+    if model is ShoppingCart:
+        lock_user(user)
+    if not insert_ignore(
+        model, ("user_id", "recipe_id"), [(user.pk, recipe.pk)], "recipe_id"
+    ):
+        return False
+    _recipes_changed(model, user, [recipe.pk], 1)
+    return True
+
+
+@transaction.atomic
+def remove_recipe(model, user, recipe_id):
+    if model is ShoppingCart:
+        lock_user(user)
+    deleted, _ = model.objects.filter(user=user, recipe_id=recipe_id).delete()
+    if deleted:
+        _recipes_changed(model, user, [recipe_id], -1)
+    return bool(deleted)
+
+
+@transaction.atomic
+def add_recipes(model, user, recipe_ids):
+    """Add many recipes to the user's favorites or cart in one INSERT.
+
+    Returns ``{recipe_id: status}``.
+    """
+    lock_user(user)
+    found = set(Recipe.objects.filter(pk__in=recipe_ids).values_list("pk", flat=True))
+    added = insert_ignore(
+        model,
+        ("user_id", "recipe_id"),
+        [(user.pk, pk) for pk in sorted(found)],
+        "recipe_id",
+    )
+    _recipes_changed(model, user, added, 1)
+    return _statuses(recipe_ids, found, added, ADDED, ALREADY_PRESENT)
+
+
+@transaction.atomic
+def remove_recipes(model, user, recipe_ids):
+    lock_user(user)
+    found = set(Recipe.objects.filter(pk__in=recipe_ids).values_list("pk", flat=True))
+    removed = delete_returning(model, "recipe_id", "user_id", user.pk, sorted(found))
+    _recipes_changed(model, user, removed, -1)
+    return _statuses(recipe_ids, found, removed, REMOVED, NOT_PRESENT)
+
+
+@transaction.atomic
+def follow(user, author):
+    if not insert_ignore(
+        Follow, ("user_id", "author_id"), [(user.pk, author.pk)], "author_id"
+    ):
+        return False
+    bump_user_version_on_commit(user.pk)
+    User.objects.filter(pk=author.pk).update(followers_count=F("followers_count") + 1)
+    return True
+
+
+@transaction.atomic
+def unfollow(user, author_id):
+    deleted, _ = user.following.filter(author_id=author_id).delete()
+    if deleted:
+        bump_user_version_on_commit(user.pk)
+        User.objects.filter(pk=author_id).update(
+            followers_count=F("followers_count") - 1
+        )
+    return bool(deleted)
+
+
+@transaction.atomic
+def follow_authors(user, author_ids):
+    lock_user(user)
+    found = set(
+        User.objects.filter(pk__in=author_ids)
+        .exclude(pk=user.pk)
+        .values_list("pk", flat=True)
+    )
+    added = insert_ignore(
+        Follow,
+        ("user_id", "author_id"),
+        [(user.pk, pk) for pk in sorted(found)],
+        "author_id",
+    )
+    User.objects.filter(pk__in=added).update(followers_count=F("followers_count") + 1)
+    if added:
+        bump_user_version_on_commit(user.pk)
+    statuses = _statuses(author_ids, found, added, ADDED, ALREADY_PRESENT)
+    if user.pk in statuses:
+        statuses[user.pk] = INVALID
+    return statuses
+
+
+@transaction.atomic
+def unfollow_authors(user, author_ids):
+    lock_user(user)
+    found = set(User.objects.filter(pk__in=author_ids).values_list("pk", flat=True))
+    removed = delete_returning(Follow, "author_id", "user_id", user.pk, sorted(found))
+    User.objects.filter(pk__in=removed).update(followers_count=F("followers_count") - 1)
+    if removed:
+        bump_user_version_on_commit(user.pk)
+    return _statuses(author_ids, found, removed, REMOVED, NOT_PRESENT)
+
+
+def delete_user_relations(user):
+    """Delete the user's favorites, cart and follows, updating the counters.
+
+    Runs before the user is deleted: the cascade would drop these rows
+    without touching the recipe and author counters that count them.
+    """
+    for model, field in RECIPE_COUNTERS.items():
+        recipe_ids = delete_returning(model, "recipe_id", "user_id", user.pk)
+        Recipe.objects.filter(pk__in=recipe_ids).update(**{field: F(field) - 1})
+    author_ids = delete_returning(Follow, "author_id", "user_id", user.pk)
+    User.objects.filter(pk__in=author_ids).update(
+        followers_count=F("followers_count") - 1
+    )
@@ -0,0 +1,179 @@
+import hashlib
+import re
+import time
+from bisect import bisect_left
+from functools import partial
+from itertools import chain
+from threading import Lock
+
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramSimilarity,
+)
+from django.db import connection, transaction
+from django.db.models import F, Q
+
+from .cache import bump_version, cache_is_shared, get_version
+from .models import Ingredient, Recipe
+
+INDEX_SCOPE = "ingredient_index"
+
+
+class IndexSnapshot:
+    """The ingredient rows of one load of ``IngredientIndex``, immutable.
+
+    Names are kept lowercased in a sorted list, so every prefix maps to a
+    contiguous range found with two bisections. Contains matches are
+    appended after the prefix matches.
+    """
+
+    def __init__(self, entries=()):
+        self.keys = [key for key, _, _ in entries]
+        self.rows = [row for _, _, row in entries]
+        self.digest = hashlib.md5(
+            repr([tuple(row.values()) for row in self.rows]).encode()
+        ).hexdigest()
+
+    def search(self, query="", limit=None):
+        keys, rows = self.keys, self.rows
+        query = query.strip().lower()
+        if not query:
+            return list(rows)
+
+        lo = bisect_left(keys, query)
+        hi = bisect_left(keys, query + "\uffff", lo)
+        results = rows[lo:hi]
+        if limit and len(results) >= limit:
+            return results[:limit]
+
+        for position in chain(range(lo), range(hi, len(keys))):
+            if query in keys[position]:
+                results.append(rows[position])
+                if limit and len(results) >= limit:
+                    break
+        return results
+
+
+class IngredientIndex:
+    """In-memory ingredient search index, loaded once per worker process.
+
+    A version counter in the shared cache lets a change in one process
+    invalidate the copies held by the others; with a process-local cache,
+    copies are reloaded every ``INGREDIENT_INDEX_RELOAD_INTERVAL`` seconds
+    instead. A request takes one ``snapshot`` and uses it for both its ETag
+    and its results, so the two always describe the same rows.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._snapshot = None
+        self._version = None
+        self._loaded_at = 0.0
+
+    def load(self, version=None):
+        entries = sorted(
+            (name.lower(), pk, {"id": pk, "name": name, "measurement_unit": unit})
+            for pk, name, unit in Ingredient.objects.values_list(
+                "id", "name", "measurement_unit"
+            )
+        )
+        snapshot = IndexSnapshot(entries)
+        with self._lock:
+            self._snapshot = snapshot
+            self._version = version
+            self._loaded_at = time.monotonic()
+        return snapshot
+
+    def invalidate(self):
+        # After commit, or other processes could reload the old rows under
+        # the new version.
+        transaction.on_commit(partial(bump_version, INDEX_SCOPE))
+        with self._lock:
+            self._snapshot = None
+
+    def snapshot(self):
+        """The loaded rows, reloaded first if they are out of date.
+
+        Reads the shared version at most once.
+        """
+        snapshot = self._snapshot
+        if not cache_is_shared():
+            expired = (
+                time.monotonic() - self._loaded_at
+                >= settings.INGREDIENT_INDEX_RELOAD_INTERVAL
+            )
+            if snapshot is None or expired:
+                snapshot = self.load()
+            return snapshot
+        # Read before the rows, so a change committed meanwhile moves it
+        # past what is stored with them.
+        version = get_version(INDEX_SCOPE)
+        if snapshot is None or self._version != version:
+            snapshot = self.load(version)
+        return snapshot
+
+    def search(self, query="", limit=None):
+        return self.snapshot().search(query, limit)
+
+
+ingredient_index = IngredientIndex()
+
+
+def search_ingredients(query, limit=None, snapshot=None):
+    """Ingredients matching ``query``, from ``snapshot`` if given."""
+    if limit is None:
+        limit = settings.INGREDIENT_SEARCH_LIMIT
+    if snapshot is None:
+        snapshot = ingredient_index.snapshot()
+    return snapshot.search(query, limit=limit)
+
+
+def recipe_search_vector():
+    config = settings.RECIPE_SEARCH_CONFIG
+    return SearchVector("name", weight="A", config=config) + SearchVector(
+        "text", weight="B", config=config
+    )
+
+
+def update_search_vectors(recipe_ids):
+    if connection.vendor == "postgresql":
+        Recipe.objects.filter(pk__in=recipe_ids).update(
+            search_vector=recipe_search_vector()
+        )
+
+
+def search_recipes(queryset, text):
+    """Filter and rank ``queryset`` by a free-text query.
+
+    On PostgreSQL every word is matched as a prefix against the weighted
+    ``search_vector`` (name above text), with a trigram match on the name
+    as a fallback for typos. Other backends get an ``icontains`` per word,
+    each on the name or the text.
+    """
+    terms = re.findall(r"\w+", text)
+    if not terms:
+        return queryset
+    if connection.vendor != "postgresql":
+        for term in terms:
+            queryset = queryset.filter(
+                Q(name__icontains=term) | Q(text__icontains=term)
+            )
+        return queryset
+
+    query = SearchQuery(
+        " & ".join(f"{term}:*" for term in terms),
+        search_type="raw",
+        config=settings.RECIPE_SEARCH_CONFIG,
+    )
+    text = " ".join(terms)
+    return (
+        queryset.filter(Q(search_vector=query) | Q(name__trigram_similar=text))
+        .annotate(
+            rank=SearchRank(F("search_vector"), query),
+            similarity=TrigramSimilarity("name", text),
+        )
+        .order_by("-rank", "-similarity", "-pub_date", "-id")
+    )
@@ -0,0 +1,161 @@
+"""Deterministic dataset for benchmarks.
+
+The same ``seed`` and ``scale`` always produce the same rows (in the same
+primary key order on an empty database), so benchmark runs are comparable.
+"""
+
+import random
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+
+from users.models import Follow, User
+
+from . import counters, shopping_list
+from .importers import READERS, import_ingredients
+from .models import Favorite, Ingredient, Recipe, RecipeIngredient, ShoppingCart
+from .search import update_search_vectors
+
+USERS_PER_SCALE = 50
+RECIPES_PER_USER = 4
+FOLLOWS_PER_USER = 10
+FAVORITES_PER_USER = 20
+CARTS_PER_USER = 5
+INGREDIENTS_PER_RECIPE = (5, 20)
+BATCH_SIZE = 1000
+# Never read: recipes only need a stored name for their image URLs.
+IMAGE = "recipes/images/benchmark.jpg"
+WORDS = (
+    "fresh spicy baked grilled creamy classic quick rustic summer winter "
+    "garlic lemon honey tomato mushroom chicken salmon potato rice soup "
+    "salad pie stew pasta curry bread cake"
+).split()
+
+
+def load_ingredients(path=None):
+    path = Path(path or settings.INGREDIENTS_DATA_FILE)
+    reader = READERS[path.suffix.lstrip(".").lower()]
+    with open(path, encoding="utf-8") as data_file:
+        import_ingredients(reader(data_file))
+
+
+def count_rows():
+    return {
+        model._meta.verbose_name_plural.lower(): model.objects.count()
+        for model in (
+            User,
+            Follow,
+            Ingredient,
+            Recipe,
+            RecipeIngredient,
+            Favorite,
+            ShoppingCart,
+        )
+    }
+
+
+def sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+@transaction.atomic
+def build_dataset(scale=1, seed=0, ingredients_file=None):
+    """Create users, follows, recipes, favorites and carts; return row counts."""
+    rng = random.Random(seed)
+    load_ingredients(ingredients_file)
+    ingredient_ids = list(
+        Ingredient.objects.order_by("pk").values_list("pk", flat=True)
+    )
+
+    password = make_password("benchmark")
+    User.objects.bulk_create(
+        (
+            User(
+                username=f"bench{number}",
+                email=f"bench{number}@example.com",
+                first_name=rng.choice(WORDS).title(),
+                last_name=rng.choice(WORDS).title(),
+                password=password,
+            )
+            for number in range(USERS_PER_SCALE * scale)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    user_ids = list(
+        User.objects.filter(username__startswith="bench")
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+    Token.objects.bulk_create(
+        (
+            Token(user_id=user_id, key=f"{seed:08x}{user_id:032x}")
+            for user_id in user_ids
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    recipes = [
+        Recipe(
+            author_id=user_id,
+            name=f"{sentence(rng, 3).capitalize()} #{index}",
+            text=sentence(rng, 40),
+            image=IMAGE,
+            cooking_time=rng.randint(5, 180),
+        )
+        for index, user_id in enumerate(
+            user_id
+            for user_id in user_ids
+            for _ in range(rng.randint(0, 2 * RECIPES_PER_USER))
+        )
+    ]
+    Recipe.objects.bulk_create(recipes, batch_size=BATCH_SIZE)
+    recipe_ids = list(
+        Recipe.objects.filter(image=IMAGE).order_by("pk").values_list("pk", flat=True)
+    )
+
+    RecipeIngredient.objects.bulk_create(
+        (
+            RecipeIngredient(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id,
+                amount=rng.randint(1, 500),
+            )
+            for recipe_id in recipe_ids
+            for ingredient_id in rng.sample(
+                ingredient_ids, rng.randint(*INGREDIENTS_PER_RECIPE)
+            )
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    Follow.objects.bulk_create(
+        (
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id in user_ids
+            for author_id in rng.sample(
+                user_ids, min(FOLLOWS_PER_USER + 1, len(user_ids))
+            )
+            if author_id != user_id
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    for model, per_user in (
+        (Favorite, FAVORITES_PER_USER),
+        (ShoppingCart, CARTS_PER_USER),
+    ):
+        model.objects.bulk_create(
+            (
+                model(user_id=user_id, recipe_id=recipe_id)
+                for user_id in user_ids
+                for recipe_id in rng.sample(recipe_ids, min(per_user, len(recipe_ids)))
+            ),
+            batch_size=BATCH_SIZE,
+        )
+
+    # bulk_create skips the signals that keep these up to date.
+    counters.reconcile()
+    shopping_list.rebuild()
+    update_search_vectors(recipe_ids)
+    return count_rows()
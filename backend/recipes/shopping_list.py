@@ -0,0 +1,192 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Sum
+
+from users.models import User
+
+from .models import RecipeIngredient, ShoppingCart, ShoppingListItem
+
+BATCH_SIZE = 1000
+
+
+def lock_users(user_ids):
+    """Lock the users' rows in primary key order for the current transaction.
+
+    The same lock ``relations`` takes before changing a user's cart, so list
+    rows of one user are never inserted by two transactions at once.
+    """
+    list(
+        User.objects.select_for_update(no_key=True)
+        .filter(pk__in=user_ids)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def recipe_amounts(recipe):
+    return dict(
+        RecipeIngredient.objects.filter(recipe=recipe).values_list(
+            "ingredient_id", "amount"
+        )
+    )
+
+
+def apply_deltas(user_ids, amounts):
+    """Add ``amounts`` ({ingredient_id: delta}) to the lists of ``user_ids``.
+
+    Must run inside the transaction that changed the carts or recipes, so the
+    aggregate never diverges from them. Rows that drop to zero are removed.
+    """
+    amounts = {pk: delta for pk, delta in amounts.items() if delta}
+    if not user_ids or not amounts:
+        return
+
+    existing = ShoppingListItem.objects.select_for_update().filter(
+        user_id__in=user_ids, ingredient_id__in=amounts
+    )
+    pending = {
+        (user_id, ingredient_id): delta
+        for user_id in user_ids
+        for ingredient_id, delta in amounts.items()
+    }
+    to_update, to_delete = [], []
+    for item in existing:
+        item.total_amount += pending.pop((item.user_id, item.ingredient_id))
+        if item.total_amount > 0:
+            to_update.append(item)
+        else:
+            to_delete.append(item.pk)
+
+    ShoppingListItem.objects.bulk_update(
+        to_update, ["total_amount"], batch_size=BATCH_SIZE
+    )
+    ShoppingListItem.objects.filter(pk__in=to_delete).delete()
+    ShoppingListItem.objects.bulk_create(
+        [
+            ShoppingListItem(
+                user_id=user_id, ingredient_id=ingredient_id, total_amount=delta
+            )
+            for (user_id, ingredient_id), delta in pending.items()
+            if delta > 0
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def recipes_amounts(recipe_ids):
+    return dict(
+        RecipeIngredient.objects.filter(recipe_id__in=recipe_ids)
+        .values_list("ingredient_id")
+        .annotate(total_amount=Sum("amount"))
+        .order_by()
+    )
+
+
+def add_recipe(user_ids, recipe):
+    apply_deltas(user_ids, recipe_amounts(recipe))
+
+
+def remove_recipe(user_ids, recipe):
+    amounts = recipe_amounts(recipe)
+    apply_deltas(user_ids, {pk: -amount for pk, amount in amounts.items()})
+
+
+def delete_recipe(recipe):
+    """Take ``recipe`` out of the lists of the users with it in their cart.
+
+    Runs before the recipe is deleted, which cascades to the cart rows.
+    """
+    user_ids = list(
+        ShoppingCart.objects.filter(recipe=recipe).values_list("user_id", flat=True)
+    )
+    if user_ids:
+        lock_users(user_ids)
+        remove_recipe(user_ids, recipe)
+
+
+def add_recipes(user_id, recipe_ids):
+    if recipe_ids:
+        apply_deltas([user_id], recipes_amounts(recipe_ids))
+
+
+def remove_recipes(user_id, recipe_ids):
+    if recipe_ids:
+        amounts = recipes_amounts(recipe_ids)
+        apply_deltas([user_id], {pk: -amount for pk, amount in amounts.items()})
+
+
+def change_recipe(recipe, old_amounts, new_amounts):
+    delta = Counter(new_amounts)
+    delta.subtract(old_amounts)
+    user_ids = list(
+        ShoppingCart.objects.filter(recipe=recipe).values_list("user_id", flat=True)
+    )
+    if user_ids and any(delta.values()):
+        lock_users(user_ids)
+        apply_deltas(user_ids, delta)
+
+
+@transaction.atomic
+def rebuild(user_ids=None):
+    """Recompute the stored lists from the carts, for everyone by default."""
+    items = ShoppingListItem.objects.all()
+    carts = ShoppingCart.objects.all()
+    if user_ids is not None:
+        lock_users(user_ids)
+        items = items.filter(user_id__in=user_ids)
+        carts = carts.filter(user_id__in=user_ids)
+    items.delete()
+    totals = (
+        carts.values_list("user_id", "recipe__recipe_ingredients__ingredient_id")
+        .annotate(total_amount=Sum("recipe__recipe_ingredients__amount"))
+        .order_by()
+    )
+    created = ShoppingListItem.objects.bulk_create(
+        (
+            ShoppingListItem(
+                user_id=user_id, ingredient_id=ingredient_id, total_amount=total
+            )
+            for user_id, ingredient_id, total in totals.iterator()
+            if ingredient_id is not None
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    return len(created)
+
+
+class ShoppingListSyncAdminMixin:
+    """Rebuilds the lists of the users affected by admin saves and deletes.
+
+    The admin bypasses the incremental updates of the API. Subclasses return
+    the affected user ids from ``shopping_list_users``; on save the rebuild
+    waits for the inlines, which may change recipe ingredients.
+    """
+
+    def shopping_list_users(self, objs):
+        raise NotImplementedError
+
+    def save_model(self, request, obj, form, change):
+        users = set()
+        if change:
+            users = self.shopping_list_users([type(obj).objects.get(pk=obj.pk)])
+        super().save_model(request, obj, form, change)
+        obj._shopping_list_users = users | self.shopping_list_users([obj])
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        users = form.instance.__dict__.pop("_shopping_list_users", None)
+        if users:
+            rebuild(users)
+
+    def delete_model(self, request, obj):
+        users = self.shopping_list_users([obj])
+        super().delete_model(request, obj)
+        if users:
+            rebuild(users)
+
+    def delete_queryset(self, request, queryset):
+        users = self.shopping_list_users(queryset)
+        super().delete_queryset(request, queryset)
+        if users:
+            rebuild(users)
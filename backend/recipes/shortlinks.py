@@ -0,0 +1,167 @@
+import atexit
+import logging
+import secrets
+import string
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import F
+
+from .cache import LRUCache
+from .metrics import record_cache
+from .models import ShortLink
+
+ALPHABET = string.digits + string.ascii_letters
+CODE_LENGTH = 6
+CODE_KEY = "recipes:short_link:{code}"
+RECIPE_KEY = "recipes:short_link:recipe:{recipe_id}"
+# Cached for unknown codes so repeated misses do not reach the database.
+MISSING = 0
+MISSING_TIMEOUT = 60
+
+logger = logging.getLogger(__name__)
+
+_resolved = LRUCache(settings.SHORT_LINK_LRU_SIZE)
+
+
+def encode(number):
+    """Base62 representation of a non-negative integer."""
+    digits = []
+    while True:
+        number, remainder = divmod(number, len(ALPHABET))
+        digits.append(ALPHABET[remainder])
+        if not number:
+            return "".join(reversed(digits))
+
+
+def new_code():
+    return encode(secrets.randbelow(len(ALPHABET) ** CODE_LENGTH)).rjust(
+        CODE_LENGTH, ALPHABET[0]
+    )
+
+
+def code_for(recipe_id):
+    """Short code of a recipe, created on first use."""
+    key = RECIPE_KEY.format(recipe_id=recipe_id)
+    code = cache.get(key)
+    if code is None:
+        code = (
+            ShortLink.objects.filter(recipe_id=recipe_id)
+            .values_list("code", flat=True)
+            .first()
+        )
+        while code is None:
+            try:
+                with transaction.atomic():
+                    code = ShortLink.objects.create(
+                        recipe_id=recipe_id, code=new_code()
+                    ).code
+            except IntegrityError:
+                # Either the code is taken or the recipe got a link meanwhile.
+                code = (
+                    ShortLink.objects.filter(recipe_id=recipe_id)
+                    .values_list("code", flat=True)
+                    .first()
+                )
+        cache.set(key, code, settings.SHORT_LINK_CACHE_TIMEOUT)
+        cache.set(
+            CODE_KEY.format(code=code), recipe_id, settings.SHORT_LINK_CACHE_TIMEOUT
+        )
+    return code
+
+
+def resolve(code):
+    """Recipe id for ``code``, or ``None``.
+
+    Looks in the process-local LRU first, then the shared cache, and only
+    then in the database.
+    """
+    recipe_id = _resolved.get(code)
+    record_cache("short_links_local", recipe_id is not None)
+    if recipe_id is None:
+        key = CODE_KEY.format(code=code)
+        recipe_id = cache.get(key)
+        record_cache("short_links", recipe_id is not None)
+        if recipe_id is None:
+            recipe_id = (
+                ShortLink.objects.filter(code=code)
+                .values_list("recipe_id", flat=True)
+                .first()
+            ) or MISSING
+            cache.set(
+                key,
+                recipe_id,
+                settings.SHORT_LINK_CACHE_TIMEOUT if recipe_id else MISSING_TIMEOUT,
+            )
+        if recipe_id:
+            _resolved.set(code, recipe_id)
+    return recipe_id or None
+
+
+def forget(code, recipe_id):
+    _resolved.delete(code)
+    cache.delete_many(
+        [CODE_KEY.format(code=code), RECIPE_KEY.format(recipe_id=recipe_id)]
+    )
+
+
+class HitCounter:
+    """Buffers redirect counts in memory and writes them in batches.
+
+    Pending hits are flushed once ``interval`` seconds have passed since the
+    last flush, and at interpreter exit. A failed flush keeps its hits for
+    the next one; the redirect that triggered it is served regardless.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+
+    def add(self, code):
+        with self._lock:
+            self._pending[code] += 1
+            due = time.monotonic() - self._flushed_at >= self.interval
+        if due:
+            try:
+                self.flush()
+            except DatabaseError:
+                logger.exception("Could not flush short link hits")
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._flushed_at = time.monotonic()
+        # One UPDATE per distinct count rather than per code.
+        by_count = defaultdict(list)
+        for code, count in pending.items():
+            by_count[count].append(code)
+        try:
+            # All or nothing, so failed hits can be put back without
+            # counting any of them twice.
+            with transaction.atomic():
+                for count, codes in by_count.items():
+                    ShortLink.objects.filter(code__in=codes).update(
+                        hits=F("hits") + count
+                    )
+        except DatabaseError:
+            with self._lock:
+                self._pending.update(pending)
+            raise
+        return sum(pending.values())
+
+
+hits = HitCounter(settings.SHORT_LINK_FLUSH_INTERVAL)
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        hits.flush()
+    except Exception:
+        pass
@@ -0,0 +1,129 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.core.files.storage import default_storage
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from users.models import User
+
+from . import counters, relations, shopping_list
+from .cache import bump_recipe_versions
+from .images import (
+    IMAGE_FIELDS,
+    get_renditions,
+    needs_renditions,
+    rendition_names,
+    schedule_renditions,
+)
+from .models import Ingredient, Recipe, ShortLink
+from .search import ingredient_index, update_search_vectors
+from .shortlinks import forget
+from .tokens import forget as forget_tokens
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredient_index(sender, **kwargs):
+    ingredient_index.invalidate()
+
+
+@receiver(post_save, sender=Recipe)
+def refresh_search_vector(sender, instance, update_fields, **kwargs):
+    if update_fields is None or {"name", "text"} & set(update_fields):
+        update_search_vectors([instance.pk])
+
+
+@receiver(pre_delete, sender=Recipe)
+def release_recipe(sender, instance, **kwargs):
+    # Every deletion path, the cascade from a deleted author included.
+    shopping_list.delete_recipe(instance)
+    counters.adjust(User, instance.author_id, recipes_count=-1)
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def release_user_relations(sender, instance, **kwargs):
+    relations.delete_user_relations(instance)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe_cache(sender, instance, **kwargs):
+    transaction.on_commit(partial(bump_recipe_versions, instance.author_id))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_author_cache(sender, instance, created, update_fields, **kwargs):
+    if created or (update_fields and set(update_fields) <= {"last_login"}):
+        return
+    # Author details are part of every recipe representation.
+    transaction.on_commit(partial(bump_recipe_versions, instance.pk))
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    transaction.on_commit(partial(forget_tokens, [instance.key]))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def forget_user_tokens(sender, instance, created, update_fields, **kwargs):
+    # Covers password changes and deactivation, along with profile edits.
+    if created or (update_fields and set(update_fields) <= {"last_login"}):
+        return
+    keys = list(Token.objects.filter(user=instance).values_list("key", flat=True))
+    if keys:
+        transaction.on_commit(partial(forget_tokens, keys))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def refresh_renditions(sender, instance, **kwargs):
+    if needs_renditions(instance):
+        schedule_renditions(instance)
+
+
+def release_files(names):
+    for name in names:
+        default_storage.delete(name)
+
+
+@receiver(pre_save, sender=Recipe)
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def remember_stored_image(sender, instance, update_fields, **kwargs):
+    field, _ = IMAGE_FIELDS[sender]
+    if instance.pk is None or (update_fields and field not in update_fields):
+        return
+    image = getattr(instance, field)
+    previous = (
+        sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first()
+    )
+    # A new upload takes its own reference even if it has the same content.
+    instance._replaced_image = (
+        previous
+        if previous and (previous != image.name or not image._committed)
+        else None
+    )
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def release_replaced_image(sender, instance, **kwargs):
+    replaced = instance.__dict__.pop("_replaced_image", None)
+    if replaced:
+        transaction.on_commit(partial(release_files, [replaced]))
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def release_deleted_files(sender, instance, **kwargs):
+    image, renditions = get_renditions(instance)
+    names = rendition_names(renditions) + ([image.name] if image else [])
+    if names:
+        transaction.on_commit(partial(release_files, names))
+
+
+@receiver(post_delete, sender=ShortLink)
+def forget_short_link(sender, instance, **kwargs):
+    transaction.on_commit(partial(forget, instance.code, instance.recipe_id))
@@ -0,0 +1,85 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.files.utils import validate_file_name
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import MediaFile
+
+
+def acquire(name):
+    """Add one reference to ``name``, creating its row if needed."""
+    table = connection.ops.quote_name(MediaFile._meta.db_table)
+    sql = (
+        f"INSERT INTO {table} (name, refs) VALUES (%s, 1) "
+        f"ON CONFLICT (name) DO UPDATE SET refs = {table}.refs + 1"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [name])
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage that names files after the SHA-256 of their content.
+
+    Saving a blob that is already stored only adds a reference to it, and
+    ``delete`` drops one; the file itself is removed with its last
+    reference. Stored files never change, so they can be cached forever.
+    Files saved before this storage was enabled have no reference row and
+    are deleted straight away, as before.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        extension = posixpath.splitext(name)[1].lower()
+        name = posixpath.join(posixpath.dirname(name), digest.hexdigest() + extension)
+        validate_file_name(name, allow_relative_path=True)
+
+        # Taking the reference first serialises us against a concurrent
+        # ``delete`` of the same blob, which removes the file under its lock.
+        acquire(name)
+        if not self.exists(name):
+            self._write(name, content)
+        return name
+
+    def _write(self, name, content):
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        if self.directory_permissions_mode is not None:
+            os.chmod(directory, self.directory_permissions_mode)
+        descriptor, temp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+        try:
+            with os.fdopen(descriptor, "wb") as temp_file:
+                content.seek(0)
+                for chunk in content.chunks():
+                    temp_file.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            # Identical content, so a concurrent writer's file is as good.
+            os.replace(temp_path, full_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    @transaction.atomic
+    def delete(self, name):
+        if not name:
+            return
+        MediaFile.objects.filter(name=name, refs__gt=0).update(refs=F("refs") - 1)
+        stored = MediaFile.objects.select_for_update().filter(name=name).first()
+        if stored is not None and stored.refs:
+            return
+        super().delete(name)
+        if stored is not None:
+            stored.delete()
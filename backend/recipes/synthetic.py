@@ -0,0 +1,320 @@
+"""Large synthetic datasets for load tests.
+
+Activity and popularity follow Zipf distributions: a few users follow,
+favorite and fill carts far more than the rest, a few authors and recipes
+collect most follows and favorites, and ingredient usage has a long tail.
+Rows are generated in chunks by worker processes, each writing its chunk
+with ``COPY`` on PostgreSQL (``bulk_create`` elsewhere) in one transaction
+with constraint checks deferred to commit.
+"""
+
+import bisect
+import csv
+import io
+import itertools
+import json
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from multiprocessing import get_context
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections, transaction
+from django.db.models import JSONField
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+from django.utils import timezone
+
+from users.models import Follow, User
+
+from .models import Favorite, Ingredient, Recipe, RecipeIngredient, ShoppingCart
+from .seed import WORDS, sentence
+
+BATCH_SIZE = 5000
+PASSWORD = "loadtest"
+HISTORY = timedelta(days=3 * 365)
+
+# State shared with the forked workers of the current phase.
+_shared = {}
+
+
+class Zipf:
+    """Draws indexes ``0..n-1``; index ``k`` has weight ``1 / (k + 1) ** s``."""
+
+    def __init__(self, n, s):
+        self.cum_weights = list(itertools.accumulate((k + 1) ** -s for k in range(n)))
+        self.total = self.cum_weights[-1] if n else 0
+
+    def __len__(self):
+        return len(self.cum_weights)
+
+    def draw(self, rng):
+        return bisect.bisect(self.cum_weights, rng.random() * self.total)
+
+    def distinct(self, rng, count, exclude=None):
+        """``count`` different indexes, skipping ``exclude``."""
+        count = min(count, len(self) - (exclude is not None))
+        drawn = set()
+        for _ in range(4 * count):
+            if len(drawn) == count:
+                break
+            index = self.draw(rng)
+            if index != exclude:
+                drawn.add(index)
+        if len(drawn) < count:
+            # The tail is too unlikely to be reached by drawing: the
+            # heaviest users get the rest of their picks uniformly.
+            rest = [
+                index
+                for index in range(len(self))
+                if index not in drawn and index != exclude
+            ]
+            drawn.update(rng.sample(rest, count - len(drawn)))
+        return list(drawn)
+
+
+def per_item_counts(rng, total, zipf):
+    """Spread ``total`` over the ``zipf`` indexes, skewed towards the first."""
+    counts = Counter(zipf.draw(rng) for _ in range(total))
+    return [counts[index] for index in range(len(zipf))]
+
+
+def _column_default(field):
+    if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
+        return timezone.now()
+    value = field.get_default()
+    if value is not None and isinstance(field, JSONField):
+        return json.dumps(value)
+    return value
+
+
+def write_rows(model, fields, rows):
+    """Insert ``rows`` (tuples of ``fields`` attnames) into ``model``'s table.
+
+    Columns not in ``fields`` get their field defaults.
+    """
+    if connection.vendor != "postgresql":
+        model.objects.bulk_create(
+            (model(**dict(zip(fields, row))) for row in rows), batch_size=BATCH_SIZE
+        )
+        return
+    columns = [field for field in model._meta.concrete_fields if not field.primary_key]
+    sql = "COPY {} ({}) FROM STDIN".format(
+        connection.ops.quote_name(model._meta.db_table),
+        ", ".join(connection.ops.quote_name(field.column) for field in columns),
+    )
+    # Building model instances would cost more than the COPY itself.
+    positions = {name: position for position, name in enumerate(fields)}
+    sources = [
+        (positions.get(field.attname), _column_default(field)) for field in columns
+    ]
+    values = (
+        [
+            default if position is None else row[position]
+            for position, default in sources
+        ]
+        for row in rows
+    )
+    with connection.cursor() as cursor:
+        # Foreign keys are checked once, at commit.
+        cursor.execute("SET CONSTRAINTS ALL DEFERRED")
+        if is_psycopg3:
+            with cursor.copy(sql) as copy:
+                for row in values:
+                    copy.write_row(row)
+        else:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(values)
+            buffer.seek(0)
+            cursor.copy_expert(f"{sql} WITH (FORMAT csv)", buffer)
+
+
+def user_rows(rng, start, stop):
+    now = timezone.now()
+    prefix = _shared["prefix"]
+    for number in range(start, stop):
+        yield (
+            f"{prefix}{number}",
+            f"{prefix}{number}@example.com",
+            rng.choice(WORDS).title(),
+            rng.choice(WORDS).title(),
+            _shared["password"],
+            now - HISTORY * rng.random(),
+        )
+
+
+def recipe_rows(rng, start, stop):
+    now = timezone.now()
+    user_ids, counts = _shared["user_ids"], _shared["counts"]
+    for index in range(start, stop):
+        for _ in range(counts[index]):
+            yield (
+                user_ids[index],
+                sentence(rng, 3).capitalize(),
+                sentence(rng, rng.randint(20, 120)),
+                _shared["image"],
+                rng.randint(5, 240),
+                now - HISTORY * rng.random(),
+            )
+
+
+def recipe_ingredient_rows(rng, start, stop):
+    recipe_ids, ingredient_ids = _shared["recipe_ids"], _shared["ingredient_ids"]
+    usage = _shared["usage"]
+    for recipe_id in recipe_ids[start:stop]:
+        for index in usage.distinct(rng, rng.randint(5, 20)):
+            yield recipe_id, ingredient_ids[index], rng.randint(1, 1000)
+
+
+def relation_rows(rng, start, stop):
+    """``(user, target)`` pairs: per-user counts, popular targets first."""
+    user_ids, counts = _shared["user_ids"], _shared["counts"]
+    target_ids, popularity = _shared["target_ids"], _shared["popularity"]
+    # Target index of each user, when users can target themselves (follows).
+    own_index = _shared["own_index"]
+    for index in range(start, stop):
+        exclude = own_index.get(user_ids[index])
+        for target in popularity.distinct(rng, counts[index], exclude):
+            yield user_ids[index], target_ids[target]
+
+
+def _run_chunk(model, fields, generate, start, stop, seed):
+    rng = random.Random(f"{seed}:{model.__name__}:{start}")
+    started = time.perf_counter()
+    rows = list(generate(rng, start, stop))
+    try:
+        with transaction.atomic():
+            write_rows(model, fields, rows)
+    finally:
+        connections.close_all()
+    return len(rows), time.perf_counter() - started
+
+
+def run_phase(model, fields, generate, items, chunk_size, workers, seed, **shared):
+    """Generate and write rows for ``items`` indexes, ``chunk_size`` at a time.
+
+    Returns ``(rows, seconds)``.
+    """
+    _shared.clear()
+    _shared.update(shared)
+    chunks = [
+        (model, fields, generate, start, min(start + chunk_size, items), seed)
+        for start in range(0, items, chunk_size)
+    ]
+    started = time.perf_counter()
+    if workers > 1:
+        # Workers are forked, inheriting ``_shared`` and the Django setup;
+        # open connections must not be shared with them.
+        connections.close_all()
+        with ProcessPoolExecutor(workers, mp_context=get_context("fork")) as pool:
+            results = list(pool.map(_run_chunk, *zip(*chunks)))
+    else:
+        results = [_run_chunk(*chunk) for chunk in chunks]
+    return sum(rows for rows, _ in results), time.perf_counter() - started
+
+
+def ordered_ids(queryset):
+    return list(queryset.order_by("pk").values_list("pk", flat=True))
+
+
+def generate(
+    users,
+    recipes,
+    follows,
+    favorites,
+    carts,
+    seed=0,
+    workers=1,
+    chunk_size=2000,
+    prefix="load",
+    skew=1.1,
+    report=print,
+):
+    """Generate the dataset, calling ``report(table, rows, seconds)`` per table."""
+    rng = random.Random(seed)
+    options = {"chunk_size": chunk_size, "workers": workers, "seed": seed}
+
+    rows, seconds = run_phase(
+        User,
+        (
+            "username",
+            "email",
+            "first_name",
+            "last_name",
+            "password",
+            "date_joined",
+        ),
+        user_rows,
+        users,
+        prefix=prefix,
+        password=make_password(PASSWORD),
+        **options,
+    )
+    report("users", rows, seconds)
+    user_ids = ordered_ids(User.objects.filter(username__startswith=prefix))
+    # Popular authors are also the prolific ones.
+    rng.shuffle(user_ids)
+    authors = Zipf(len(user_ids), skew)
+
+    rows, seconds = run_phase(
+        Recipe,
+        (
+            "author_id",
+            "name",
+            "text",
+            "image",
+            "cooking_time",
+            "pub_date",
+        ),
+        recipe_rows,
+        len(user_ids),
+        user_ids=user_ids,
+        counts=per_item_counts(rng, recipes, authors),
+        image="recipes/images/loadtest.jpg",
+        **options,
+    )
+    report("recipes", rows, seconds)
+    recipe_ids = ordered_ids(Recipe.objects.filter(author_id__in=user_ids))
+
+    ingredient_ids = ordered_ids(Ingredient.objects.all())
+    rng.shuffle(ingredient_ids)
+    rows, seconds = run_phase(
+        RecipeIngredient,
+        ("recipe_id", "ingredient_id", "amount"),
+        recipe_ingredient_rows,
+        len(recipe_ids),
+        recipe_ids=recipe_ids,
+        ingredient_ids=ingredient_ids,
+        usage=Zipf(len(ingredient_ids), skew),
+        **options,
+    )
+    report("recipe ingredients", rows, seconds)
+
+    # Activity is skewed independently of popularity.
+    active_ids = list(user_ids)
+    rng.shuffle(active_ids)
+    activity = Zipf(len(active_ids), skew)
+    popular_recipe_ids = list(recipe_ids)
+    rng.shuffle(popular_recipe_ids)
+    recipe_popularity = Zipf(len(recipe_ids), skew)
+    author_index = {user_id: index for index, user_id in enumerate(user_ids)}
+    relations = (
+        (Follow, "author_id", follows, user_ids, authors, author_index),
+        (Favorite, "recipe_id", favorites, popular_recipe_ids, recipe_popularity, {}),
+        (ShoppingCart, "recipe_id", carts, popular_recipe_ids, recipe_popularity, {}),
+    )
+    for model, target, total, target_ids, popularity, own_index in relations:
+        rows, seconds = run_phase(
+            model,
+            ("user_id", target),
+            relation_rows,
+            len(active_ids),
+            user_ids=active_ids,
+            counts=per_item_counts(rng, total, activity),
+            target_ids=target_ids,
+            popularity=popularity,
+            own_index=own_index,
+            **options,
+        )
+        report(model._meta.verbose_name_plural.lower(), rows, seconds)
@@ -0,0 +1,190 @@
+"""Per-request timings: database, view, serialization and rendering.
+
+``ServerTimingMiddleware`` should be the first middleware. It reports the
+timings of every request in a ``Server-Timing`` header, logs a sampled
+share of requests, and logs requests slower than their route's threshold
+together with their most expensive SQL statements.
+"""
+
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = defaultdict(float)
+        self.queries = 0
+        # SQL -> [executions, total seconds]
+        self.statements = defaultdict(lambda: [0, 0.0])
+        self._depth = defaultdict(int)
+
+    def add_query(self, sql, duration):
+        self.queries += 1
+        self.durations["db"] += duration
+        statement = self.statements[sql]
+        statement[0] += 1
+        statement[1] += duration
+
+    def top_statements(self, limit):
+        ranked = sorted(self.statements.items(), key=lambda item: -item[1][1])
+        return [
+            {"sql": sql, "count": count, "ms": round(total * 1000, 2)}
+            for sql, (count, total) in ranked[:limit]
+        ]
+
+    def milliseconds(self):
+        return {name: round(value * 1000, 2) for name, value in self.durations.items()}
+
+
+def current_timings():
+    """Timings of the request being handled, if any."""
+    return _current.get()
+
+
+@contextmanager
+def measure(name):
+    """Add the time spent in the block to metric ``name`` of this request.
+
+    Nested blocks for the same metric are only counted once.
+    """
+    timings = _current.get()
+    if timings is None or timings._depth[name]:
+        yield
+        return
+    timings._depth[name] += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.durations[name] += time.perf_counter() - started
+        timings._depth[name] -= 1
+
+
+def time_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add_query(sql, time.perf_counter() - started)
+
+
+def install_query_timer(connection, **kwargs):
+    # Installed on every connection rather than per request, so queries run
+    # from other threads (``sync_to_async``) are attributed to the request
+    # through the context variable.
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+connection_created.connect(install_query_timer)
+
+
+class ServerTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings)
+
+    def process_template_response(self, request, response):
+        # Called between the view and rendering.
+        timings = _current.get()
+        if timings is not None:
+            timings.durations["view"] = time.perf_counter() - timings.started
+            rendering = time.perf_counter()
+
+            def rendered(response):
+                timings.durations["render"] = time.perf_counter() - rendering
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, timings):
+        total = time.perf_counter() - timings.started
+        durations = timings.durations
+        durations["total"] = total
+        # The view and the middleware below this one, if nothing rendered.
+        durations.setdefault("view", total - durations.get("render", 0))
+        if settings.SERVER_TIMING_HEADER:
+            response["Server-Timing"] = self.header(timings)
+        self.log(request, response, timings)
+        return response
+
+    @staticmethod
+    def header(timings):
+        metrics = [
+            f'db;dur={timings.durations["db"] * 1000:.2f};'
+            f'desc="{timings.queries} queries"'
+        ]
+        for name in ("view", "serialize", "render", "total"):
+            if name in timings.durations:
+                metrics.append(f"{name};dur={timings.durations[name] * 1000:.2f}")
+        return ", ".join(metrics)
+
+    @staticmethod
+    def log(request, response, timings):
+        match = request.resolver_match
+        route = match.view_name if match else None
+        threshold = settings.SLOW_REQUEST_THRESHOLDS.get(
+            route, settings.SLOW_REQUEST_THRESHOLD
+        )
+        total_ms = timings.durations["total"] * 1000
+        slow = total_ms >= threshold
+        if not slow and random.random() >= settings.SERVER_TIMING_LOG_SAMPLE_RATE:
+            return
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "route": route,
+            "status": response.status_code,
+            "queries": timings.queries,
+            **timings.milliseconds(),
+        }
+        if slow:
+            record["threshold"] = threshold
+            record["top_sql"] = timings.top_statements(settings.SLOW_REQUEST_TOP_SQL)
+            logger.warning("slow request %s", json.dumps(record))
+        else:
+            logger.info("request %s", json.dumps(record))
@@ -0,0 +1,111 @@
+"""Token -> user lookups for authentication, cached.
+
+Snapshots of the token's user are kept in a per-process LRU and, when the
+cache backend is shared by all processes, in the shared cache, so
+authenticated requests need no query once warm. Deleting a token (logout)
+or saving its user (password change, deactivation, profile edits) drops
+the snapshot from the shared cache and the local LRU of the process doing
+it; other processes may use their local copy for up to
+``TOKEN_CACHE_LOCAL_TIMEOUT`` seconds more.
+"""
+
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from rest_framework.authtoken.models import Token
+
+from users.models import User
+
+from .cache import LRUCache, cache_is_shared
+from .metrics import record_cache
+
+TOKEN_KEY = "recipes:token:{key}"
+# Never cached: the password hash, and the counters that are updated in
+# place. They stay deferred, so saving a snapshot user does not write them.
+UNCACHED_FIELDS = {"password", "recipes_count", "followers_count"}
+SNAPSHOT_FIELDS = [
+    field.attname
+    for field in User._meta.concrete_fields
+    if field.attname not in UNCACHED_FIELDS
+]
+
+_snapshots = LRUCache(
+    settings.TOKEN_CACHE_LRU_SIZE, timeout=settings.TOKEN_CACHE_LOCAL_TIMEOUT
+)
+# Process-wide rather than a context variable: benchmarks set it for the
+# worker threads they start.
+_bypassed = False
+
+
+def _query(key):
+    return Token.objects.filter(key=key).values_list(
+        *(f"user__{field}" for field in SNAPSHOT_FIELDS)
+    )
+
+
+def _cached(key):
+    if _bypassed:
+        return None
+    values = _snapshots.get(key)
+    record_cache("auth_tokens_local", values is not None)
+    # A process-local cache would outlive invalidations made by the others.
+    if values is None and cache_is_shared():
+        values = cache.get(TOKEN_KEY.format(key=key))
+        record_cache("auth_tokens", values is not None)
+        if values is not None:
+            _snapshots.set(key, values)
+    return values
+
+
+def _remember(key, values):
+    if _bypassed:
+        return
+    if cache_is_shared():
+        cache.set(TOKEN_KEY.format(key=key), values, settings.TOKEN_CACHE_TIMEOUT)
+    _snapshots.set(key, values)
+
+
+def _user(values):
+    # A new instance per request: views may modify ``request.user``.
+    return User.from_db(router.db_for_read(User), SNAPSHOT_FIELDS, values)
+
+
+def get_user(key):
+    """The user owning token ``key``, or ``None`` for an unknown token."""
+    values = _cached(key)
+    if values is None:
+        values = _query(key).first()
+        if values is None:
+            return None
+        _remember(key, values)
+    return _user(values)
+
+
+async def aget_user(key):
+    """``get_user`` for async views."""
+    values = _cached(key)
+    if values is None:
+        values = await _query(key).afirst()
+        if values is None:
+            return None
+        _remember(key, values)
+    return _user(values)
+
+
+def forget(keys):
+    for key in keys:
+        _snapshots.delete(key)
+    cache.delete_many([TOKEN_KEY.format(key=key) for key in keys])
+
+
+@contextmanager
+def bypassed():
+    """Look every token up in the database, in all threads of the process."""
+    global _bypassed
+    _bypassed = True
+    try:
+        yield
+    finally:
+        _bypassed = False
@@ -2,13 +2,17 @@ from django.contrib import admin
 from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
+from recipes.cache import UserVersionAdminMixin
+from recipes.counters import CounterSyncAdminMixin
+from recipes.models import Favorite, ShoppingCart
+
 from .models import Follow
 
 User = get_user_model()
 
 
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(CounterSyncAdminMixin, BaseUserAdmin):
     ordering = ["email"]
     list_display = (
         "id",
@@ -16,6 +20,8 @@ class UserAdmin(BaseUserAdmin):
         "username",
         "first_name",
         "last_name",
+        "recipes_count",
+        "followers_count",
         "is_staff",
     )
     list_filter = ("is_staff", "is_superuser", "is_active")
@@ -27,9 +33,26 @@ class UserAdmin(BaseUserAdmin):
     )
     readonly_fields = ("last_login", "date_joined")
 
+    def counter_targets(self, objs):
+        pks = [obj.pk for obj in objs]
+        recipe_ids = set(
+            Favorite.objects.filter(user_id__in=pks).values_list("recipe_id", flat=True)
+        ) | set(
+            ShoppingCart.objects.filter(user_id__in=pks).values_list(
+                "recipe_id", flat=True
+            )
+        )
+        author_ids = set(
+            Follow.objects.filter(user_id__in=pks).values_list("author_id", flat=True)
+        )
+        return recipe_ids, author_ids
+
 
 @admin.register(Follow)
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(UserVersionAdminMixin, CounterSyncAdminMixin, admin.ModelAdmin):
     list_display = ("user", "author")
     search_fields = ("user__username", "author__username")
     list_filter = ("author",)
+
+    def counter_targets(self, objs):
+        return (), {obj.author_id for obj in objs}
@@ -0,0 +1,53 @@
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_relations(apps, schema_editor):
+    User = apps.get_model("users", "User")
+    counters = {
+        "recipes_count": apps.get_model("recipes", "Recipe"),
+        "followers_count": apps.get_model("users", "Follow"),
+    }
+    User.objects.update(
+        **{
+            field: Coalesce(
+                Subquery(
+                    model.objects.filter(author=OuterRef("pk"))
+                    .order_by()
+                    .values("author")
+                    .annotate(total=Count("pk"))
+                    .values("total"),
+                    output_field=IntegerField(),
+                ),
+                Value(0),
+            )
+            for field, model in counters.items()
+        }
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+        ("recipes", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="followers_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Followers Count"
+            ),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="recipes_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Recipes Count"
+            ),
+        ),
+        migrations.RunPython(count_relations, migrations.RunPython.noop),
+    ]
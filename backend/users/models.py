@@ -31,6 +31,22 @@ class User(AbstractUser):
     avatar = models.ImageField(
         upload_to="accounts/avatars/", blank=True, null=True, verbose_name="Avatar"
     )
+    avatar_renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Avatar Renditions",
+    )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Recipes Count",
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Followers Count",
+    )
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username", "first_name", "last_name"]